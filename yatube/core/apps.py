@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     name = 'core'
     verbose_name = 'приложение для контекст процессоров'
+
+    def ready(self) -> None:
+        from core import db  # noqa: F401
@@ -0,0 +1,25 @@
+"""Настройка соединений SQLite под одновременные чтение и запись.
+
+При каждом новом соединении применяются SQLITE_PRAGMAS: журнал WAL,
+в котором читатели не ждут писателя, synchronous=NORMAL (в WAL
+надёжно и без fsync на каждую транзакцию), mmap_size и cache_size для
+чтения без лишних системных вызовов и busy_timeout, чтобы писатели
+ждали друг друга, а не падали с «database is locked». Соединения
+живут CONN_MAX_AGE секунд, поэтому прагмы выполняются раз на поток
+воркера, а не на каждый запрос.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def apply_pragmas(cursor, pragmas: dict) -> None:
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created, dispatch_uid='core_sqlite_pragmas')
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
@@ -0,0 +1,37 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import sqlite_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет чтение и запись SQLite из нескольких процессов с '
+        'прагмами по умолчанию и с SQLITE_PRAGMAS и выводит JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--seconds',
+            type=float,
+            default=5,
+            help='Длительность каждого прогона.',
+        )
+        parser.add_argument(
+            '--posts',
+            type=int,
+            default=10**5,
+            help='Число постов во временной базе.',
+        )
+
+    def handle(self, *args, **options):
+        report = sqlite_benchmark.run(
+            options['readers'],
+            options['writers'],
+            options['seconds'],
+            options['posts'],
+        )
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
@@ -0,0 +1,176 @@
+"""Замеры SQL, рендеринга шаблонов и кэша для части запросов.
+
+Для выбранного запроса (доля задаётся SERVER_TIMING_SAMPLE_RATE)
+считаются число и время SQL-запросов, время рендеринга шаблонов,
+попадания и промахи кэша. Итог уходит в заголовок Server-Timing и
+одной JSON-строкой в лог core.server_timing. Остальные запросы
+проходят без замеров, поэтому мидлварь можно держать включённой.
+
+Время шаблонов включает запросы, выполненные во время рендеринга
+(например, ленивые QuerySet в цикле), поэтому суммы не складываются.
+"""
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.cache.backends.base import BaseCache
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.template.base import Template
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('core.server_timing')
+
+_current: ContextVar[Optional['Metrics']] = ContextVar(
+    'server_timing',
+    default=None,
+)
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Вложенные вызовы (include, get_many через get) не считаются.
+        self.active: set[str] = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.sql_count += 1
+
+    def header(self, total: float) -> str:
+        return ', '.join(
+            (
+                f'sql;dur={self.sql_time * 1000:.1f};'
+                f'desc="{self.sql_count} queries"',
+                f'tpl;dur={self.template_time * 1000:.1f}',
+                f'cache;desc="{self.cache_hits} hits '
+                f'{self.cache_misses} misses"',
+                f'total;dur={total * 1000:.1f}',
+            ),
+        )
+
+    def as_dict(self, total: float) -> dict:
+        return {
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_time * 1000, 3),
+            'template_ms': round(self.template_time * 1000, 3),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'total_ms': round(total * 1000, 3),
+        }
+
+
+def _outermost(group: str, method: Callable, measure: Callable) -> Callable:
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        metrics = _current.get()
+        if metrics is None or group in metrics.active:
+            return method(self, *args, **kwargs)
+        metrics.active.add(group)
+        started = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+            measure(
+                metrics,
+                result,
+                time.perf_counter() - started,
+                *args,
+                **kwargs,
+            )
+            return result
+        finally:
+            metrics.active.discard(group)
+
+    wrapper.server_timing = True
+    return wrapper
+
+
+def _template(metrics: Metrics, result: str, elapsed: float, *args) -> None:
+    metrics.template_time += elapsed
+
+
+def _cache_get(
+    metrics: Metrics,
+    result: Any,
+    elapsed: float,
+    key: str,
+    default: Any = None,
+    **kwargs,
+) -> None:
+    if result is default:
+        metrics.cache_misses += 1
+    else:
+        metrics.cache_hits += 1
+
+
+def _cache_get_many(
+    metrics: Metrics,
+    result: dict,
+    elapsed: float,
+    keys: list,
+    **kwargs,
+) -> None:
+    metrics.cache_hits += len(result)
+    metrics.cache_misses += len(keys) - len(result)
+
+
+def _patch(cls: type, name: str, group: str, measure: Callable) -> None:
+    method = getattr(cls, name)
+    if not getattr(method, 'server_timing', False):
+        setattr(cls, name, _outermost(group, method, measure))
+
+
+def _install() -> None:
+    _patch(Template, 'render', 'template', _template)
+    for cache in settings.CACHES.values():
+        backend = import_string(cache['BACKEND'])
+        if issubclass(backend, BaseCache):
+            _patch(backend, 'get', 'cache', _cache_get)
+            _patch(backend, 'get_many', 'cache', _cache_get_many)
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        _install()
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        metrics = Metrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+        response['Server-Timing'] = metrics.header(total)
+        logger.info(
+            json.dumps(
+                {
+                    'method': request.method,
+                    'path': request.path,
+                    'status': response.status_code,
+                    **metrics.as_dict(total),
+                },
+            ),
+        )
+        return response
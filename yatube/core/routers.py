@@ -0,0 +1,96 @@
+"""Чтение с реплик базы данных, запись в основную базу.
+
+ReplicaMiddleware на время безопасного запроса (GET, HEAD) выбирает
+одну из DATABASE_REPLICAS, и ReplicaRouter отправляет туда чтение.
+В основную базу идут запись, запросы вне HTTP (команды, фоновые
+потоки) и все запросы клиента в течение REPLICA_STICKY_SECONDS после
+его записи: так редирект после post_create показывает новый пост, даже
+если реплика отстаёт. Признак недавней записи хранится в cookie, чтобы
+не читать ради него сессию.
+"""
+import random
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+PRIMARY = 'default'
+
+STICKY_COOKIE = 'primary_db'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Сессии и хранилище миниатюр читаются сразу после записи, а копии
+# SQLite-реплик могут отставать сколько угодно.
+PRIMARY_APPS = {'sessions', 'thumbnail'}
+
+_replica: ContextVar[Optional[str]] = ContextVar('replica', default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        if model._meta.app_label in PRIMARY_APPS:
+            return PRIMARY
+        return _replica.get() or PRIMARY
+
+    def db_for_write(self, model, **hints) -> str:
+        # Без явного ответа Django пишет в базу, из которой прочитан объект.
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        return True
+
+    def allow_migrate(self, db, app_label, **hints) -> Optional[bool]:
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+def use_primary() -> None:
+    """Отправляет остальное чтение текущего запроса в основную базу.
+
+    Нужно перед заполнением кэша: данные отстающей реплики попали бы в
+    него под новой версией и жили бы там до истечения срока.
+    """
+    _replica.set(None)
+
+
+def primary_db(view: Callable) -> Callable:
+    """Отмечает представление, которое пишет в базу и при GET."""
+    view.writes = True
+    return view
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        request.writes = request.method not in SAFE_METHODS
+        replica = None
+        if (
+            settings.DATABASE_REPLICAS
+            and not request.writes
+            and STICKY_COOKIE not in request.COOKIES
+        ):
+            replica = random.choice(settings.DATABASE_REPLICAS)
+        token = _replica.set(replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica.reset(token)
+        if request.writes and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                STICKY_COOKIE,
+                '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, 'writes', False):
+            request.writes = True
+            use_primary()
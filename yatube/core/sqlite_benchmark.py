@@ -0,0 +1,161 @@
+"""Пропускная способность SQLite при одновременных чтении и записи.
+
+Во временной базе со схемой, похожей на посты и комментарии, несколько
+процессов-читателей запрашивают страницу ленты, а процессы-писатели
+добавляют комментарии и увеличивают счётчик у поста, как add_comment.
+Замер повторяется с прагмами SQLite по умолчанию (BEFORE) и с
+SQLITE_PRAGMAS проекта; для каждого прогона считаются операции в
+секунду и ошибки «database is locked».
+"""
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+
+from core.db import apply_pragmas
+
+# Прагмы, с которыми Django открывает SQLite без настройки.
+BEFORE = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+SCHEMA = (
+    '''
+    CREATE TABLE post (
+        id INTEGER PRIMARY KEY,
+        text TEXT NOT NULL,
+        pub_date TEXT NOT NULL,
+        comment_count INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    'CREATE INDEX post_pub_date ON post (pub_date DESC, id DESC)',
+    '''
+    CREATE TABLE comment (
+        id INTEGER PRIMARY KEY,
+        post_id INTEGER NOT NULL REFERENCES post (id),
+        text TEXT NOT NULL,
+        created TEXT NOT NULL
+    )
+    ''',
+)
+
+FEED = '''
+    SELECT id, text, pub_date, comment_count FROM post
+    ORDER BY pub_date DESC, id DESC LIMIT 10 OFFSET ?
+'''
+
+TIMEOUT = 5
+
+
+def prepare(path: Path, posts: int) -> None:
+    with sqlite3.connect(path) as connection:
+        for statement in SCHEMA:
+            connection.execute(statement)
+        connection.executemany(
+            'INSERT INTO post (text, pub_date) VALUES (?, ?)',
+            (
+                (f'Пост {number} ' * 20, f'{number:012d}')
+                for number in range(posts)
+            ),
+        )
+    connection.close()
+
+
+def _connect(path: Path, pragmas: dict) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, timeout=TIMEOUT, isolation_level=None)
+    apply_pragmas(connection.cursor(), pragmas)
+    return connection
+
+
+def _read(connection: sqlite3.Connection, number: int, posts: int) -> None:
+    connection.execute(FEED, (number * 10 % posts,)).fetchall()
+
+
+def _write(connection: sqlite3.Connection, number: int, posts: int) -> None:
+    post = number % posts + 1
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        connection.execute(
+            'INSERT INTO comment (post_id, text, created) VALUES (?, ?, ?)',
+            (post, 'Комментарий', f'{number:012d}'),
+        )
+        connection.execute(
+            'UPDATE post SET comment_count = comment_count + 1 WHERE id = ?',
+            (post,),
+        )
+    except BaseException:
+        connection.execute('ROLLBACK')
+        raise
+    connection.execute('COMMIT')
+
+
+def _worker(
+    path: Path,
+    pragmas: dict,
+    write: bool,
+    seconds: float,
+    posts: int,
+) -> tuple[int, int]:
+    """Число выполненных операций и ошибок блокировки за seconds."""
+    connection = _connect(path, pragmas)
+    operation = _write if write else _read
+    done = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        try:
+            operation(connection, done + errors, posts)
+        except sqlite3.OperationalError as error:
+            if 'locked' not in str(error):
+                raise
+            errors += 1
+        else:
+            done += 1
+    connection.close()
+    return done, errors
+
+
+def measure(
+    pragmas: dict,
+    readers: int,
+    writers: int,
+    seconds: float,
+    posts: int,
+) -> dict:
+    """Операции в секунду и ошибки читателей и писателей."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'benchmark.sqlite3'
+        prepare(path, posts)
+        with ProcessPoolExecutor(max_workers=readers + writers) as pool:
+            futures = [
+                pool.submit(_worker, path, pragmas, write, seconds, posts)
+                for write in [False] * readers + [True] * writers
+            ]
+            results = [future.result() for future in futures]
+    reads, writes = results[:readers], results[readers:]
+    return {
+        'reads_per_second': round(sum(done for done, _ in reads) / seconds),
+        'writes_per_second': round(
+            sum(done for done, _ in writes) / seconds,
+        ),
+        'read_errors': sum(errors for _, errors in reads),
+        'write_errors': sum(errors for _, errors in writes),
+    }
+
+
+def run(readers: int, writers: int, seconds: float, posts: int) -> dict:
+    """Замеры с прагмами по умолчанию и с прагмами проекта."""
+    return {
+        'readers': readers,
+        'writers': writers,
+        'seconds': seconds,
+        'posts': posts,
+        'before': measure(BEFORE, readers, writers, seconds, posts),
+        'after': measure(
+            settings.SQLITE_PRAGMAS,
+            readers,
+            writers,
+            seconds,
+            posts,
+        ),
+    }
@@ -0,0 +1,25 @@
+from django import template
+from django.core.paginator import Page
+
+from yatube.utils import CURSOR_PARAM
+
+register = template.Library()
+
+PAGE_WINDOW = 5
+
+
+@register.filter
+def page_window(page: Page, size: int = PAGE_WINDOW) -> range:
+    """Номера страниц вокруг текущей вместо полного page_range."""
+    return range(
+        max(page.number - size, 1),
+        min(page.number + size, page.paginator.num_pages) + 1,
+    )
+
+
+@register.simple_tag(takes_context=True)
+def cursor_query(context: template.Context, cursor: str) -> str:
+    """Параметры текущего запроса с подставленным курсором."""
+    query = context['request'].GET.copy()
+    query[CURSOR_PARAM] = cursor
+    return query.urlencode()
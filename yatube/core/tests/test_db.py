@@ -0,0 +1,32 @@
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core import sqlite_benchmark
+
+
+class SqlitePragmasTest(TestCase):
+    def pragma(self, name: str):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_to_new_connections(self):
+        """Новое соединение получает прагмы из SQLITE_PRAGMAS."""
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('cache_size'), -64 * 1024)
+
+
+class SqliteBenchmarkTest(SimpleTestCase):
+    def test_reports_before_and_after(self):
+        """Замер возвращает пропускную способность до и после настройки."""
+        report = sqlite_benchmark.run(
+            readers=1,
+            writers=1,
+            seconds=0.2,
+            posts=100,
+        )
+        for profile in ('before', 'after'):
+            with self.subTest(profile=profile):
+                self.assertGreater(report[profile]['reads_per_second'], 0)
+                self.assertGreater(report[profile]['writes_per_second'], 0)
@@ -0,0 +1,51 @@
+from django.contrib.sessions.models import Session
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.routers import STICKY_COOKIE, ReplicaMiddleware, primary_db
+from posts.models import Post
+
+
+def read_alias(request):
+    return HttpResponse(router.db_for_read(Post))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_STICKY_SECONDS=5)
+class ReplicaRouterTest(SimpleTestCase):
+    factory = RequestFactory()
+
+    def call(self, request, view=read_alias) -> HttpResponse:
+        middleware = ReplicaMiddleware(
+            lambda request: (
+                middleware.process_view(request, view, (), {}) or view(request)
+            ),
+        )
+        return middleware(request)
+
+    def test_safe_requests_read_from_replica(self):
+        """GET читает с реплики, а запись всегда идёт в основную базу."""
+        response = self.call(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica')
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_write(Post), 'default')
+        self.assertEqual(router.db_for_read(Session), 'default')
+
+    def test_writes_stick_to_primary(self):
+        """После записи клиент какое-то время читает из основной базы."""
+        response = self.call(self.factory.post('/'))
+        self.assertEqual(response.content, b'default')
+        self.assertEqual(response.cookies[STICKY_COOKIE]['max-age'], 5)
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE] = '1'
+        self.assertEqual(self.call(request).content, b'default')
+
+    def test_writing_get_view_uses_primary(self):
+        """Представление, которое пишет при GET, читает из основной базы."""
+        response = self.call(
+            self.factory.get('/'),
+            primary_db(lambda request: read_alias(request)),
+        )
+        self.assertEqual(response.content, b'default')
+        self.assertIn(STICKY_COOKIE, response.cookies)
@@ -0,0 +1,49 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+
+class ServerTimingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        mixer.cycle(3).blend('posts.Post')
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_sampled_request_reports_timings(self):
+        """Замеры уходят в заголовок Server-Timing и в лог."""
+        with self.assertLogs('core.server_timing', 'INFO') as logs:
+            response = self.client.get(reverse('posts:h_page'))
+        header = response['Server-Timing']
+        for metric in ('sql;dur=', 'tpl;dur=', 'cache;desc=', 'total;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, header)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], reverse('posts:h_page'))
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['sql_count'], 0)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertGreater(record['cache_misses'], 0)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_cache_hits_counted(self):
+        """Повторный запрос ленты берёт фрагмент из кэша."""
+        url = reverse('posts:h_page')
+        self.client.get(url)
+        with self.assertLogs('core.server_timing', 'INFO') as logs:
+            self.client.get(url)
+        self.assertGreater(
+            json.loads(logs.records[0].getMessage())['cache_hits'],
+            0,
+        )
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_request_is_not_measured(self):
+        """Запросы вне выборки проходят без замеров."""
+        response = self.client.get(reverse('posts:h_page'))
+        self.assertNotIn('Server-Timing', response)
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from posts import search
 from posts.models import Comment, Follow, Group, Post
 from yatube.admin import BaseAdmin
 
@@ -17,6 +18,11 @@ class PostAdmin(BaseAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not search.is_supported():
+            return super().get_search_results(request, queryset, search_term)
+        return search.search(queryset, search_term), False
+
 
 @admin.register(Group)
 class GroupAdmin(BaseAdmin):
@@ -0,0 +1,176 @@
+"""JSON-версии лент и страницы поста только для чтения.
+
+Посты читаются через values() сразу в нужном виде, без создания
+объектов моделей, и отдаются страницами по курсору. Для картинки
+возвращается ссылка на оригинал и его размеры: миниатюры клиенты
+строят сами.
+"""
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, QuerySet
+from django.http import HttpRequest, JsonResponse
+
+from posts import follow_graph, images
+from posts.models import Comment, Group, Post
+from yatube.utils import KeysetPage, paginate_by_cursor
+
+User = get_user_model()
+
+POST_FIELDS = (
+    'id',
+    'text',
+    'pub_date',
+    'image',
+    'image_width',
+    'image_height',
+    'comment_count',
+)
+
+POST_ALIASES = {
+    'username': F('author__username'),
+    'group_slug': F('group__slug'),
+}
+
+ALIASES = tuple(POST_ALIASES)
+
+POST_KEYS = ('pub_date', 'id')
+
+COMMENT_FIELDS = ('id', 'text', 'created')
+
+MAX_IDS = 100
+
+
+def _posts(queryset: QuerySet, *extra: str) -> QuerySet:
+    return queryset.values(*POST_FIELDS, *extra, **POST_ALIASES)
+
+
+def _post(row: dict) -> dict:
+    row['image'] = images.storage.url(row['image']) if row['image'] else None
+    return row
+
+
+def _page(page: KeysetPage, results: list) -> dict:
+    return {
+        'results': results,
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    }
+
+
+def _feed(
+    request: HttpRequest,
+    posts: QuerySet,
+    keys: tuple[str, str] = POST_KEYS,
+) -> JsonResponse:
+    page = paginate_by_cursor(
+        request,
+        _posts(posts, *(key for key in keys if key not in POST_FIELDS)),
+        keys=keys,
+    )
+    return JsonResponse(
+        _page(
+            page,
+            [
+                _post({field: row[field] for field in POST_FIELDS + ALIASES})
+                for row in page
+            ],
+        ),
+    )
+
+
+def _error(status: int, detail: str) -> JsonResponse:
+    return JsonResponse({'detail': detail}, status=status)
+
+
+def _not_found() -> JsonResponse:
+    return _error(404, 'Не найдено.')
+
+
+def index(request: HttpRequest) -> JsonResponse:
+    return _feed(request, Post.objects.all())
+
+
+def group_posts(request: HttpRequest, slug: str) -> JsonResponse:
+    group = Group.objects.filter(slug=slug).values_list('pk', flat=True)
+    if (group_id := group.first()) is None:
+        return _not_found()
+    return _feed(request, Post.objects.filter(group_id=group_id))
+
+
+def profile(request: HttpRequest, username: str) -> JsonResponse:
+    author = User.objects.filter(username=username).values_list(
+        'pk',
+        flat=True,
+    )
+    if (author_id := author.first()) is None:
+        return _not_found()
+    return _feed(request, Post.objects.filter(author_id=author_id))
+
+
+def follow_index(request: HttpRequest) -> JsonResponse:
+    if not request.user.is_authenticated:
+        return _error(401, 'Требуется авторизация.')
+    return _feed(
+        request,
+        Post.objects.filter(timeline__user=request.user).annotate(
+            feed_date=F('timeline__pub_date'),
+            feed_post=F('timeline__post'),
+        ),
+        ('feed_date', 'feed_post'),
+    )
+
+
+def post_detail(request: HttpRequest, pk: int) -> JsonResponse:
+    post = _posts(Post.objects.filter(pk=pk)).first()
+    if post is None:
+        return _not_found()
+    comments = paginate_by_cursor(
+        request,
+        Comment.objects.filter(post_id=pk).values(
+            *COMMENT_FIELDS,
+            username=F('author__username'),
+        ),
+        settings.COMMENTS_PER_PAGE,
+        keys=('created', 'id'),
+    )
+    return JsonResponse(
+        {**_post(post), 'comments': _page(comments, list(comments))},
+    )
+
+
+def _ids(request: HttpRequest) -> Optional[list[int]]:
+    try:
+        ids = [
+            int(value)
+            for value in request.GET.get('ids', '').split(',')
+            if value
+        ]
+    except ValueError:
+        return None
+    return list(dict.fromkeys(ids))
+
+
+def posts_by_ids(request: HttpRequest) -> JsonResponse:
+    """Посты по списку id в порядке запроса; отсутствующие пропускаются."""
+    ids = _ids(request)
+    if ids is None:
+        return _error(400, 'ids — список целых чисел через запятую.')
+    if len(ids) > MAX_IDS:
+        return _error(400, f'Не больше {MAX_IDS} id за запрос.')
+    rows = {row['id']: row for row in _posts(Post.objects.filter(pk__in=ids))}
+    return JsonResponse(
+        {'results': [_post(rows[pk]) for pk in ids if pk in rows]},
+    )
+
+
+def following_ids(request: HttpRequest) -> JsonResponse:
+    """Те из авторов ids, на кого подписан пользователь (для кнопок)."""
+    ids = _ids(request)
+    if ids is None:
+        return _error(400, 'ids — список целых чисел через запятую.')
+    if len(ids) > MAX_IDS:
+        return _error(400, f'Не больше {MAX_IDS} id за запрос.')
+    followed = follow_graph.followed_ids(request.user, ids)
+    return JsonResponse({'following': [pk for pk in ids if pk in followed]})
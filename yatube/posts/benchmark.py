@@ -0,0 +1,275 @@
+"""Замеры представлений лент на наборах данных разного размера.
+
+Данные досеваются до нужного числа постов порциями через bulk_create,
+после чего каждое представление запрашивается тестовым клиентом
+несколько раз. Для каждого представления считаются p50/p95 времени
+ответа, число SQL-запросов и их суммарное время.
+
+card_cost() отдельно сравнивает стоимость рендера одной карточки
+поста через {% include %} в цикле и через posts.cards.render_cards.
+"""
+import time
+from datetime import timedelta
+from itertools import cycle, islice
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Max
+from django.template import engines
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+
+from posts import cards, counters, timeline
+from posts.importer import bulk_create_with_dates, reset_sequences
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+AUTHORS = 100
+
+GROUPS = 10
+
+FOLLOWING = 10
+
+READER = 'benchmark-reader'
+
+BATCH_SIZE = 10000
+
+TEXTS = 500
+
+POST_INTERVAL = timedelta(minutes=1)
+
+
+def _users() -> tuple[list, User]:
+    reader, _ = User.objects.get_or_create(username=READER)
+    authors = list(
+        User.objects.exclude(pk=reader.pk).order_by('pk')[:AUTHORS],
+    )
+    if len(authors) < AUTHORS:
+        User.objects.bulk_create(
+            User(username=f'benchmark-author-{number}')
+            for number in range(len(authors), AUTHORS)
+        )
+        authors = list(
+            User.objects.exclude(pk=reader.pk).order_by('pk')[:AUTHORS],
+        )
+    Follow.objects.bulk_create(
+        (Follow(user=reader, author=author) for author in authors[:FOLLOWING]),
+        ignore_conflicts=True,
+    )
+    return authors, reader
+
+
+def _groups() -> list:
+    groups = list(Group.objects.order_by('pk')[:GROUPS])
+    if len(groups) < GROUPS:
+        Group.objects.bulk_create(
+            Group(
+                title=f'Группа {number}',
+                slug=f'benchmark-{number}',
+                description='Группа для замеров.',
+            )
+            for number in range(len(groups), GROUPS)
+        )
+        groups = list(Group.objects.order_by('pk')[:GROUPS])
+    return groups
+
+
+def _new_posts(count: int, authors: list, groups: list) -> Iterator[Post]:
+    fake = Faker('ru_RU')
+    texts = cycle([fake.paragraph() for _ in range(TEXTS)])
+    start = timezone.now() - POST_INTERVAL * count
+    # Авторы и группы по кругу: у каждого автора, в том числе у тех, на
+    # кого подписан читатель, есть посты, и замеры повторяемы.
+    groups_or_none = [*groups, None]
+    # Явные id нужны bulk_create_with_dates для возврата дат.
+    first_pk = (Post.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+    for number in range(count):
+        yield Post(
+            pk=first_pk + number,
+            text=next(texts),
+            author=authors[number % len(authors)],
+            group=groups_or_none[number % len(groups_or_none)],
+            pub_date=start + POST_INTERVAL * number,
+        )
+
+
+def seed(total: int) -> None:
+    """Досевает данные так, чтобы постов в базе стало total."""
+    authors, reader = _users()
+    groups = _groups()
+    posts = _new_posts(
+        max(total - Post.objects.count(), 0),
+        authors,
+        groups,
+    )
+    while batch := list(islice(posts, BATCH_SIZE)):
+        bulk_create_with_dates(Post, batch)
+    reset_sequences()
+    post = Post.objects.order_by('-pub_date', '-pk').first()
+    fake = Faker('ru_RU')
+    texts = islice(
+        cycle([fake.sentence() for _ in range(TEXTS)]),
+        max(total // 100 - post.comments.count(), 0),
+    )
+    Comment.objects.bulk_create(
+        Comment(post=post, author=author, text=text)
+        for author, text in zip(cycle(authors), texts)
+    )
+    timeline.rebuild()
+    counters.rebuild()
+
+
+def _percentile(values: list, percent: int) -> float:
+    values = sorted(values)
+    return values[max(round(len(values) * percent / 100) - 1, 0)]
+
+
+def _urls() -> dict:
+    post = Post.objects.order_by('-pub_date', '-pk').first()
+    group = Group.objects.order_by('pk').first()
+    author = User.objects.exclude(username=READER).order_by('pk').first()
+    pages = Post.objects.count() // settings.OBJECTS_PER_PAGE
+    return {
+        'index': reverse('posts:h_page'),
+        'index_deep': f"{reverse('posts:h_page')}?page={pages // 2 or 1}",
+        'group_posts': reverse('posts:page_post', args=(group.slug,)),
+        'profile': reverse('posts:profile', args=(author.username,)),
+        'post_detail': reverse('posts:post_detail', args=(post.pk,)),
+        'follow_index': reverse('posts:follow_index'),
+    }
+
+
+class QueryTimer:
+    """Обёртка выполнения запросов: считает их число и время.
+
+    Время запросов в connection.queries округлено до миллисекунд,
+    поэтому здесь оно меряется отдельно.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+def measure(client: Client, url: str, repeat: int, warm: bool) -> dict:
+    """Время ответа и SQL-нагрузка одного адреса за repeat запросов."""
+    latencies, queries, sql_time = [], [], []
+    for _ in range(repeat):
+        if not warm:
+            cache.clear()
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            started = time.perf_counter()
+            response = client.get(url)
+            latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, (url, response.status_code)
+        queries.append(timer.count)
+        sql_time.append(timer.seconds * 1000)
+    return {
+        'p50_ms': round(_percentile(latencies, 50), 3),
+        'p95_ms': round(_percentile(latencies, 95), 3),
+        'queries': max(queries),
+        'sql_ms': round(_percentile(sql_time, 50), 3),
+    }
+
+
+def run(
+    sizes: list,
+    repeat: int,
+    warm: bool = False,
+    views: Optional[list] = None,
+) -> dict:
+    """Замеры по всем размерам данных, от меньшего к большему."""
+    client = Client()
+    results = {}
+    for size in sorted(sizes):
+        seed(size)
+        client.force_login(User.objects.get(username=READER))
+        urls = _urls()
+        results[str(size)] = {
+            name: measure(client, url, repeat, warm)
+            for name, url in urls.items()
+            if not views or name in views
+        }
+    return {
+        'database': connection.vendor,
+        'repeat': repeat,
+        'warm_cache': warm,
+        'results': results,
+    }
+
+
+# Цикл лент до render_cards: адреса и include на каждой итерации.
+INCLUDE_LOOP = (
+    '{% for post in posts %}'
+    "{% url 'posts:profile' post.author.username as profile_url %}"
+    "{% url 'posts:page_post' post.group.slug as group_url %}"
+    '{% include "posts/includes/post.html" with group_link=True %}'
+    '{% endfor %}'
+)
+
+
+def _card_posts(count: int) -> list[Post]:
+    """Посты в памяти, как на странице ленты, без обращений к базе."""
+    authors = [
+        User(pk=number, username=f'benchmark-author-{number}')
+        for number in range(1, 4)
+    ]
+    group = Group(pk=1, title='Группа', slug='benchmark-0')
+    now = timezone.now()
+    return [
+        Post(
+            pk=number,
+            text=f'Пост {number}',
+            author=authors[number % len(authors)],
+            group=group,
+            pub_date=now,
+            updated_at=now,
+        )
+        for number in range(1, count + 1)
+    ]
+
+
+def card_cost(count: int = 10, repeat: int = 200) -> dict:
+    """Микросекунды на карточку: include в цикле и render_cards."""
+    posts = _card_posts(count)
+    for post in posts:
+        post.thumbnail = None
+    include_loop = engines['django'].from_string(INCLUDE_LOOP)
+    variants = {
+        'include': lambda: include_loop.render({'posts': posts}),
+        'compiled': lambda: cards.render_cards(
+            ((post, post is posts[-1]) for post in posts),
+            group_link=True,
+        ),
+    }
+    result = {}
+    for name, render in variants.items():
+        render()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            render()
+        seconds = time.perf_counter() - started
+        result[f'{name}_us_per_card'] = round(
+            seconds / (repeat * count) * 10**6,
+            1,
+        )
+    result['speedup'] = round(
+        result['include_us_per_card'] / result['compiled_us_per_card'],
+        2,
+    )
+    return result
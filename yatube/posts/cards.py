@@ -0,0 +1,108 @@
+"""Кэш HTML карточек постов в лентах.
+
+Карточка (posts/includes/post.html) хранится под ключом из id поста и
+его updated_at, поэтому правка поста, его автора или группы и
+появление миниатюры дают новый ключ, а старая карточка просто
+перестаёт запрашиваться. Лента берёт карточки страницы одним
+get_many и рендерит только отсутствующие; миниатюры тоже ищутся
+только для них.
+
+Недостающие карточки рендерятся без {% include %}: шаблон компилируется
+один раз на процесс, все карточки страницы проходят через один
+Context, а адреса профилей и групп вычисляются по разу на автора и
+группу.
+"""
+from functools import lru_cache
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template import Context, Template
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils.safestring import SafeString, mark_safe
+
+from posts import thumbnails
+from posts.models import Post
+
+TEMPLATE = 'posts/includes/post.html'
+
+
+@lru_cache(maxsize=None)
+def _template() -> Template:
+    return get_template(TEMPLATE).template
+
+
+class _Urls(dict):
+    """Адреса, вычисленные за один рендер страницы."""
+
+    def get(self, name: str, arg: str) -> str:
+        if (name, arg) not in self:
+            self[name, arg] = reverse(name, args=(arg,))
+        return self[name, arg]
+
+
+def key(post: Post, group_link: bool, last: bool) -> str:
+    return (
+        f'posts:card:{post.pk}:{post.updated_at.timestamp()}'
+        f':{int(group_link)}:{int(last)}'
+    )
+
+
+def render_cards(
+    posts: Iterable[tuple[Post, bool]],
+    group_link: bool = False,
+) -> list[str]:
+    """HTML карточек для пар (пост, последний ли он на странице)."""
+    template = _template()
+    urls = _Urls()
+    context = Context({'group_link': group_link})
+    rendered = []
+    for post, last in posts:
+        with context.push(
+            post=post,
+            forloop={'last': last},
+            profile_url=urls.get('posts:profile', post.author.username),
+            group_url=(
+                urls.get('posts:page_post', post.group.slug)
+                if group_link and post.group_id
+                else ''
+            ),
+        ):
+            rendered.append(template.render(context))
+    return rendered
+
+
+def render(
+    posts: Iterable[Post],
+    group_link: bool = False,
+) -> list[SafeString]:
+    """HTML карточек постов по порядку, как include post.html в цикле."""
+    posts = list(posts)
+    keys = [
+        key(post, group_link, number == len(posts) - 1)
+        for number, post in enumerate(posts)
+    ]
+    cards = cache.get_many(keys)
+    missing = [
+        (number, post)
+        for number, (post, card_key) in enumerate(zip(posts, keys))
+        if card_key not in cards
+    ]
+    if missing:
+        thumbnails.prefetch(post for _, post in missing)
+        rendered = dict(
+            zip(
+                (keys[number] for number, _ in missing),
+                render_cards(
+                    (
+                        (post, number == len(posts) - 1)
+                        for number, post in missing
+                    ),
+                    group_link,
+                ),
+            ),
+        )
+        cache.set_many(rendered, settings.FEED_CACHE_TIMEOUT)
+        cards.update(rendered)
+    return [mark_safe(cards[card_key]) for card_key in keys]
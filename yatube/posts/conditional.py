@@ -0,0 +1,182 @@
+"""Условные GET (ETag и Last-Modified) для лент и страницы поста.
+
+Для каждой области (вся лента, группа, автор, пост) в кэше хранится
+пара (время последнего изменения, число записей). При промахе она
+считается одним агрегатным запросом по индексу, а запись постов,
+комментариев, групп и подписок после фиксации транзакции сдвигает
+время изменения затронутых областей. Поэтому проверка обычно стоит
+одного обращения к кэшу, а 304 отдаётся до рендеринга страницы.
+
+После вытеснения из кэша пара считается заново, поэтому время изменения
+берётся и по updated_at: правка текста или группы поста не меняет
+дату публикации. Число записей нужно потому, что удаление старой
+записи не меняет ни одну из максимальных дат.
+"""
+import hashlib
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, QuerySet
+from django.db.models.functions import Coalesce, Greatest
+from django.http import HttpRequest
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from core.routers import PRIMARY
+from posts.models import Post
+
+Validator = tuple[datetime, Optional[int]]
+
+
+def _feed(posts: QuerySet) -> dict:
+    return posts.aggregate(
+        modified=Greatest(Max('pub_date'), Max('updated_at')),
+        count=Count('pk'),
+    )
+
+
+# Валидаторы кэшируются, поэтому считаются по основной базе, а не по
+# реплике, которая может отставать.
+_posts = Post.objects.db_manager(PRIMARY)
+
+SCOPES = {
+    'index': lambda key: _feed(_posts.all()),
+    'group': lambda slug: _feed(_posts.filter(group__slug=slug)),
+    'profile': lambda username: _feed(
+        _posts.filter(author__username=username),
+    ),
+    'author': lambda pk: _feed(_posts.filter(author_id=pk)),
+    'post': lambda pk: _posts.filter(pk=pk).aggregate(
+        modified=Greatest(
+            Coalesce(Max('comments__created'), Max('pub_date')),
+            Max('pub_date'),
+            Max('updated_at'),
+        ),
+        count=Count('comments'),
+    ),
+}
+
+
+GENERATION_KEY = 'posts:validator_generation'
+
+
+def _generation() -> int:
+    return cache.get_or_set(GENERATION_KEY, time.time_ns, None)
+
+
+def _key(scope: str, key: object) -> str:
+    return f'posts:validator:{_generation()}:{scope}:{key}'
+
+
+def invalidate() -> None:
+    """Сбрасывает валидаторы всех областей (например, после импорта).
+
+    Поколение входит в ETag, а его время — в Last-Modified, поэтому
+    страницы меняют валидаторы, даже если даты и число записей те же
+    (например, после переименования автора).
+    """
+    cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def _generation_moment(generation: int) -> datetime:
+    moment = datetime.fromtimestamp(generation / 1e9, tz=timezone.utc)
+    return moment if settings.USE_TZ else timezone.make_naive(moment)
+
+
+def validator(scope: str, key: object = '') -> Optional[Validator]:
+    """Время изменения и число записей области или None, если она пуста."""
+    value = cache.get(_key(scope, key))
+    if value is None:
+        row = SCOPES[scope](key)
+        if row['modified'] is None:
+            return None
+        value = (row['modified'], row['count'])
+        cache.set(_key(scope, key), value, settings.FEED_CACHE_TIMEOUT)
+    return value
+
+
+def post_author(pk: int) -> Optional[int]:
+    """id автора поста для валидатора страницы поста.
+
+    Хранится id, а не username: имя пользователя можно сменить.
+    """
+    author_id = cache.get(_key('post_author', pk))
+    if author_id is None:
+        author_id = (
+            Post.objects.filter(pk=pk)
+            .values_list('author_id', flat=True)
+            .first()
+        )
+        if author_id is not None:
+            cache.set(_key('post_author', pk), author_id, None)
+    return author_id
+
+
+def bump(scope: str, key: object = '') -> None:
+    """Отмечает изменение области после фиксации транзакции."""
+    transaction.on_commit(
+        lambda: cache.set(
+            _key(scope, key),
+            (timezone.now(), None),
+            settings.FEED_CACHE_TIMEOUT,
+        ),
+    )
+
+
+def bump_user(pk: int, username: str) -> None:
+    """Страница профиля (по имени) и данные автора на страницах постов."""
+    bump('profile', username)
+    bump('author', pk)
+
+
+def bump_post(
+    pk: int,
+    author_id: int,
+    username: str,
+    group_slug: Optional[str],
+) -> None:
+    bump('index')
+    bump('post', pk)
+    bump_user(author_id, username)
+    if group_slug:
+        bump('group', group_slug)
+
+
+def conditional(scopes: Callable[..., list]) -> Callable:
+    """Декоратор представления: ETag и Last-Modified по областям scopes.
+
+    scopes получает аргументы представления и возвращает список пар
+    (область, ключ). Страница зависит ещё от пользователя и параметров
+    запроса, поэтому они входят в ETag.
+    """
+
+    def validators(request: HttpRequest, **kwargs) -> Optional[list]:
+        if not hasattr(request, '_post_validators'):
+            values = [
+                (_generation_moment(_generation()), None),
+                *(validator(*scope) for scope in scopes(**kwargs)),
+            ]
+            request._post_validators = None if None in values else values
+        return request._post_validators
+
+    def etag(request: HttpRequest, **kwargs) -> Optional[str]:
+        values = validators(request, **kwargs)
+        if values is None:
+            return None
+        return hashlib.md5(
+            repr(
+                (values, request.user.pk, request.get_full_path()),
+            ).encode(),
+        ).hexdigest()
+
+    def last_modified(request: HttpRequest, **kwargs) -> Optional[datetime]:
+        values = validators(request, **kwargs)
+        if values is None:
+            return None
+        return max(modified for modified, _ in values)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
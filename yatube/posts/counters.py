@@ -0,0 +1,69 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Представления и сигналы (для числа постов автора) меняют счётчики
+атомарно через F()-выражения в момент записи, а rebuild()
+пересчитывает их целиком, если они разошлись с данными (например,
+после правок через админку).
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+
+def _count(queryset: QuerySet, field: str) -> Coalesce:
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+        ),
+        0,
+    )
+
+
+def user_stats(user: User) -> UserStats:
+    """Статистика пользователя или нулевая, если её ещё нет."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return UserStats(user=user)
+
+
+def change_user_stats(user_id: int, **deltas: int) -> None:
+    if not UserStats.objects.filter(user_id=user_id).update(
+        **{name: F(name) + delta for name, delta in deltas.items()},
+    ):
+        rebuild_user_stats(User.objects.filter(pk=user_id))
+
+
+def change_comment_count(post_id: int, delta: int) -> None:
+    Post.objects.filter(pk=post_id).update(
+        comment_count=F('comment_count') + delta,
+    )
+
+
+def rebuild_user_stats(users: QuerySet) -> None:
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=pk) for pk in users.values_list('pk', flat=True)),
+        ignore_conflicts=True,
+    )
+    UserStats.objects.filter(user__in=users).update(
+        posts_count=_count(Post.objects.all(), 'author'),
+        followers_count=_count(Follow.objects.all(), 'author'),
+        following_count=_count(Follow.objects.all(), 'user'),
+    )
+
+
+def rebuild_comment_counts() -> None:
+    Post.objects.update(comment_count=_count(Comment.objects.all(), 'post'))
+
+
+def rebuild() -> None:
+    rebuild_comment_counts()
+    rebuild_user_stats(User.objects.all())
@@ -0,0 +1,65 @@
+"""Кэш HTML-фрагментов лент.
+
+Ключ фрагмента учитывает представление, его область (группу или
+автора), номер страницы или разобранный курсор и версию лент. Версия
+меняется при любой записи постов, комментариев и групп, поэтому
+устаревший фрагмент просто перестаёт запрашиваться. Большое время
+жизни безопасно только с общим для всех процессов кэшем (см.
+FEED_CACHE_TIMEOUT в настройках).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.paginator import Page
+from django.http import HttpRequest
+
+from core.routers import use_primary
+
+VERSION_KEY = 'posts:feed_version'
+
+# Имя фрагмента в {% cache ... feed feed_cache_key %} шаблонов лент.
+FRAGMENT = 'feed'
+
+
+def version() -> int:
+    return cache.get_or_set(VERSION_KEY, time.time_ns, None)
+
+
+def bump() -> None:
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _position(page: Page) -> str:
+    # Ключ строится по нормализованной позиции, а не по строке запроса:
+    # иначе ?page=foo, ?page=999999 и любые курсоры заводили бы новые
+    # записи в кэше для одной и той же страницы.
+    if not getattr(page.paginator, 'keyset', False):
+        return f'p{page.number}'
+    # Некорректный или пустой курсор — первая страница.
+    return 'c' + (page.cursor or '')
+
+
+def context(request: HttpRequest, page: Page, scope: object = '') -> dict:
+    """Переменные для тега {% cache %} в шаблонах лент."""
+    position = _position(page)
+    key = ':'.join(
+        (
+            request.resolver_match.view_name,
+            str(scope),
+            position,
+            str(version()),
+        ),
+    )
+    if make_template_fragment_key(FRAGMENT, [key]) not in cache:
+        # Фрагмент попадёт в кэш под текущей версией лент, поэтому его
+        # данные читаются из основной базы, а не с отстающей реплики.
+        use_primary()
+    return {
+        'feed_cache_timeout': settings.FEED_CACHE_TIMEOUT,
+        'feed_cache_key': key,
+    }
@@ -0,0 +1,79 @@
+"""Число постов в лентах для постраничного вывода без SELECT COUNT(*).
+
+Итоги лент (все посты, группа, автор, лента подписок читателя)
+хранятся в кэше. При промахе итог считается одним COUNT по основной
+базе (с отстающей реплики в кэш попало бы старое значение) и кладётся
+в кэш, а создание, удаление и перенос поста в другую группу после
+фиксации транзакции меняют его через incr. Ленты подписок меняются
+сразу у многих читателей, поэтому их итоги не пересчитываются, а
+сбрасываются.
+"""
+import time
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.routers import PRIMARY
+from posts.models import Post, TimelineEntry
+
+_posts = Post.objects.db_manager(PRIMARY)
+
+_timeline = TimelineEntry.objects.db_manager(PRIMARY)
+
+COUNTS = {
+    'index': lambda key: _posts.count(),
+    'group': lambda pk: _posts.filter(group_id=pk).count(),
+    'author': lambda pk: _posts.filter(author_id=pk).count(),
+    'follow': lambda pk: _timeline.filter(user_id=pk).count(),
+}
+
+GENERATION_KEY = 'posts:count_generation'
+
+
+def _generation() -> int:
+    return cache.get_or_set(GENERATION_KEY, time.time_ns, None)
+
+
+def _key(scope: str, key: object, generation: Optional[int] = None) -> str:
+    return f'posts:count:{generation or _generation()}:{scope}:{key}'
+
+
+def invalidate() -> None:
+    """Сбрасывает итоги всех лент (например, после импорта)."""
+    cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def count(scope: str, key: object = '') -> int:
+    cache_key = _key(scope, key)
+    value = cache.get(cache_key)
+    if value is None:
+        value = COUNTS[scope](key)
+        cache.add(cache_key, value, settings.FEED_CACHE_TIMEOUT)
+    return value
+
+
+def provider(scope: str, key: object = '') -> Callable[[], int]:
+    """Функция для paginate(count=...): итог ленты по требованию."""
+    return lambda: count(scope, key)
+
+
+def _incr(cache_key: str, delta: int) -> None:
+    try:
+        cache.incr(cache_key, delta)
+    except ValueError:
+        # Итога нет в кэше: его посчитает следующее чтение.
+        pass
+
+
+def change(scope: str, key: object, delta: int) -> None:
+    """Меняет итог ленты после фиксации транзакции."""
+    cache_key = _key(scope, key)
+    transaction.on_commit(lambda: _incr(cache_key, delta))
+
+
+def forget(scope: str, keys: Iterable[object]) -> None:
+    generation = _generation()
+    cache_keys = [_key(scope, key, generation) for key in keys]
+    transaction.on_commit(lambda: cache.delete_many(cache_keys))
@@ -0,0 +1,108 @@
+"""Граф подписок: подписка, отписка, списки и проверка подписок.
+
+Подписка — один INSERT, пропускающий уже существующую пару, отписка —
+один DELETE по фильтру, поэтому повторный запрос безопасен и не требует
+предварительного чтения. Счётчики, ленты и валидаторы меняются, только
+если запрос действительно что-то изменил; сигналы модели при этом не
+отправляются, их работу выполняет _changed().
+"""
+from typing import Iterable
+
+from django.contrib.auth import get_user_model
+from django.db import connections, router, transaction
+from django.db.models import F, QuerySet
+
+from posts import conditional, counters, timeline
+from posts.models import Follow
+
+User = get_user_model()
+
+# Ключи постраничного вывода списков: подписки новее — выше.
+KEYS = ('follow_id', 'pk')
+
+
+def _execute(sql: str, user_id: int, author_id: int) -> int:
+    connection = connections[router.db_for_write(Follow)]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql.format(
+                insert=connection.ops.insert_statement(ignore_conflicts=True),
+                suffix=connection.ops.ignore_conflicts_suffix_sql(
+                    ignore_conflicts=True,
+                ),
+                table=quote(Follow._meta.db_table),
+                user=quote(Follow._meta.get_field('user').column),
+                author=quote(Follow._meta.get_field('author').column),
+            ),
+            (user_id, author_id),
+        )
+        return cursor.rowcount
+
+
+def _changed(user: User, author: User, delta: int) -> None:
+    counters.change_user_stats(author.pk, followers_count=delta)
+    counters.change_user_stats(user.pk, following_count=delta)
+    conditional.bump_user(author.pk, author.username)
+    conditional.bump_user(user.pk, user.username)
+
+
+def follow(user: User, author: User) -> bool:
+    """Подписывает user на author; True, если подписки ещё не было."""
+    if user.pk == author.pk:
+        return False
+    with transaction.atomic(using=router.db_for_write(Follow)):
+        created = _execute(
+            '{insert} {table} ({user}, {author}) VALUES (%s, %s) {suffix}',
+            user.pk,
+            author.pk,
+        )
+        if created:
+            _changed(user, author, 1)
+            timeline.backfill(user, author)
+    return bool(created)
+
+
+def unfollow(user: User, author: User) -> bool:
+    """Отписывает user от author; True, если подписка была."""
+    with transaction.atomic(using=router.db_for_write(Follow)):
+        deleted = _execute(
+            'DELETE FROM {table} WHERE {user} = %s AND {author} = %s',
+            user.pk,
+            author.pk,
+        )
+        if deleted:
+            _changed(user, author, -1)
+            timeline.prune(user, author)
+    return bool(deleted)
+
+
+def followers(author: User) -> QuerySet:
+    """Подписчики автора, новые подписки первыми."""
+    return (
+        User.objects.filter(follower__author=author)
+        .annotate(follow_id=F('follower__pk'))
+        .order_by('-follow_id')
+    )
+
+
+def following(user: User) -> QuerySet:
+    """Авторы, на которых подписан пользователь, новые подписки первыми."""
+    return (
+        User.objects.filter(following__user=user)
+        .annotate(follow_id=F('following__pk'))
+        .order_by('-follow_id')
+    )
+
+
+def followed_ids(user: User, author_ids: Iterable[int]) -> set[int]:
+    """Те из author_ids, на кого подписан user, одним запросом."""
+    author_ids = list(author_ids)
+    if not user.is_authenticated or not author_ids:
+        return set()
+    return set(
+        Follow.objects.filter(
+            user=user,
+            author_id__in=author_ids,
+        ).values_list('author_id', flat=True),
+    )
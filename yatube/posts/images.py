@@ -0,0 +1,152 @@
+"""Метаданные и фоновая обработка загруженных картинок постов.
+
+Размеры и формат картинки записываются в пост при сохранении, по
+заголовку загруженного файла, поэтому лентам и API не нужно открывать
+файлы из хранилища.
+
+После сохранения поста картинка уходит в пул потоков thumbnails, и
+запрос не ждёт работы Pillow. Обработка поворачивает картинку по
+EXIF, убирает метаданные, уменьшает до IMAGE_MAX_SIZE по большей
+стороне и перекодирует в IMAGE_FORMAT. Готовый файл сохраняется рядом,
+после чего пост одним UPDATE переключается на него, а старый файл
+удаляется вместе с миниатюрами. Если пост успели изменить, новый файл
+удаляется, а пост остаётся как есть.
+"""
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+from sorl.thumbnail import delete
+from sorl.thumbnail.images import ImageFile
+
+from posts import thumbnails
+from posts.models import Post
+
+storage = Post._meta.get_field('image').storage
+
+METADATA_FIELDS = ('image_width', 'image_height', 'image_format')
+
+
+def metadata(file) -> dict:
+    """Размеры и формат картинки; читается только заголовок файла."""
+    with Image.open(file) as image:
+        width, height = image.size
+        return {
+            'image_width': width,
+            'image_height': height,
+            'image_format': image.format,
+        }
+
+
+def stored_metadata(name: str) -> dict:
+    with storage.open(name) as file:
+        return metadata(file)
+
+
+def record_metadata(post: Post) -> None:
+    """Запоминает в посте размеры и формат новой или удалённой картинки."""
+    if not post.image:
+        values = dict.fromkeys(METADATA_FIELDS[:2])
+        values['image_format'] = ''
+    elif not post.image._committed:
+        values = metadata(post.image)
+        post.image.seek(0)
+    else:
+        return
+    for field, value in values.items():
+        setattr(post, field, value)
+
+
+def is_processed(image: Image.Image) -> bool:
+    return (
+        image.format == settings.IMAGE_FORMAT
+        and max(image.size) <= settings.IMAGE_MAX_SIZE
+        and 'exif' not in image.info
+    )
+
+
+def _convert(image: Image.Image) -> Image.Image:
+    """Картинка в режиме, который поддерживает IMAGE_FORMAT."""
+    has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+    if not has_alpha:
+        return image.convert('RGB')
+    image = image.convert('RGBA')
+    if settings.IMAGE_FORMAT == 'WEBP':
+        return image
+    background = Image.new('RGB', image.size, 'white')
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def optimize(name: str) -> str:
+    """Сохраняет обработанную копию картинки и возвращает её имя.
+
+    Уже обработанная картинка не копируется: возвращается name.
+    """
+    limit = settings.IMAGE_MAX_SIZE
+    with storage.open(name) as file, Image.open(file) as source:
+        if is_processed(source):
+            return name
+        # JPEG можно сразу декодировать в уменьшенном виде.
+        source.draft('RGB', (limit, limit))
+        image = _convert(ImageOps.exif_transpose(source))
+        image.thumbnail((limit, limit), Image.LANCZOS)
+        content = BytesIO()
+        image.save(
+            content,
+            settings.IMAGE_FORMAT,
+            quality=settings.IMAGE_QUALITY,
+            icc_profile=source.info.get('icc_profile'),
+        )
+    root, _ = posixpath.splitext(name)
+    return storage.save(
+        f'{root}.{settings.IMAGE_FORMAT.lower()}',
+        ContentFile(content.getvalue()),
+    )
+
+
+def process(name: str) -> None:
+    """Обрабатывает картинку, переключает на неё посты и создаёт миниатюры."""
+    if not Post.objects.filter(image=name).exists():
+        return
+    processed = optimize(name)
+    if processed != name:
+        with transaction.atomic():
+            swapped = Post.objects.filter(image=name).update(
+                image=processed,
+                updated_at=timezone.now(),
+                **stored_metadata(processed),
+            )
+        if not swapped:
+            storage.delete(processed)
+            return
+        delete(ImageFile(name, storage))
+    thumbnails.generate(processed)
+
+
+def move_to_storage(name: str) -> str:
+    """Переносит файл со старым именем в хранилище по содержимому."""
+    legacy = FileSystemStorage(
+        location=storage.location,
+        base_url=storage.base_url,
+    )
+    with legacy.open(name) as file:
+        moved = storage.save(name, file)
+    Post.objects.filter(image=name).update(
+        image=moved,
+        updated_at=timezone.now(),
+    )
+    # Вместе со старым файлом удаляются и его миниатюры.
+    delete(ImageFile(name, legacy))
+    return moved
+
+
+def enqueue(post: Post) -> None:
+    """Ставит картинку поста в очередь на обработку."""
+    if post.image:
+        thumbnails.schedule(post.image.name, process)
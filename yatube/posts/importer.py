@@ -0,0 +1,311 @@
+"""Пакетный импорт пользователей, групп, постов, комментариев и подписок.
+
+Вход — JSONL, по записи в строке; тип записи задаёт поле type:
+
+    {"type": "user", "username": "leo", "email": "", "password": "..."}
+    {"type": "group", "slug": "cats", "title": "...", "description": ""}
+    {"type": "post", "id": 1, "author": "leo", "group": "cats",
+     "text": "...", "pub_date": "2020-01-01T10:00:00", "image": ""}
+    {"type": "comment", "id": 1, "post": 1, "author": "leo",
+     "text": "...", "created": "2020-01-02T10:00:00"}
+    {"type": "follow", "user": "leo", "author": "tolstoy"}
+
+Строки читаются порциями; каждая порция пишется через bulk_create в
+своей транзакции, без сигналов. Пользователи и группы ищутся по
+username и slug в словарях в памяти, посты и комментарии сохраняют id
+из источника. Запись, id которой уже занят, пропускается: повторная
+вставка загруженной порции ничего не меняет, и после сбоя импорт можно
+продолжить с последней сохранённой позиции. Комментарии привязываются
+только к постам этого импорта: если id поста занят другим постом (не
+совпадают автор или текст), его комментарии тоже пропускаются.
+Производные данные (счётчики, ленты, поисковый индекс, кэши)
+пересчитываются один раз в конце.
+"""
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import (
+    conditional,
+    counters,
+    feed_cache,
+    feed_counts,
+    search,
+    timeline,
+)
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+ORDER = ('user', 'group', 'post', 'comment', 'follow')
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+def bulk_create_with_dates(model: type, objects: list, **kwargs) -> None:
+    """bulk_create, сохраняющий заданные у объектов даты auto_now_add.
+
+    bulk_create заполняет такие поля текущим временем, поэтому даты
+    запоминаются заранее и возвращаются следующим bulk_update по pk.
+    У объектов должен быть задан pk.
+    """
+    fields = [
+        model_field.attname
+        for model_field in model._meta.concrete_fields
+        if getattr(model_field, 'auto_now_add', False)
+    ]
+    dates = [[getattr(obj, name) for name in fields] for obj in objects]
+    model.objects.bulk_create(objects, **kwargs)
+    if not fields or not objects:
+        return
+    for obj, values in zip(objects, dates):
+        for name, value in zip(fields, values):
+            setattr(obj, name, value)
+    model.objects.bulk_update(objects, fields)
+
+
+@dataclass
+class Stats:
+    lines: int = 0
+    rows: int = 0
+    skipped: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / max(time.perf_counter() - self.started, 1e-9)
+
+
+def _date(value: Optional[str]) -> datetime:
+    if not value:
+        return timezone.now()
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise InvalidRecord(f'Некорректная дата: {value}')
+    if settings.USE_TZ and timezone.is_naive(parsed):
+        return timezone.make_aware(parsed)
+    if not settings.USE_TZ and timezone.is_aware(parsed):
+        return timezone.make_naive(parsed)
+    return parsed
+
+
+class Importer:
+    def __init__(self, batch_size: int) -> None:
+        self.batch_size = batch_size
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        # id постов из источника, уже лежащих в базе, — сюда можно
+        # привязывать комментарии.
+        self.posts = set()
+        self.stats = Stats()
+
+    def _user(self, record: dict) -> User:
+        return User(
+            username=record['username'],
+            first_name=record.get('first_name', ''),
+            last_name=record.get('last_name', ''),
+            email=record.get('email', ''),
+            password=record.get('password') or '!',
+            date_joined=_date(record.get('date_joined')),
+        )
+
+    def _group(self, record: dict) -> Group:
+        return Group(
+            slug=record['slug'],
+            title=record['title'],
+            description=record.get('description', ''),
+        )
+
+    def _post(self, record: dict) -> Optional[Post]:
+        author = self.users.get(record['author'])
+        group = record.get('group')
+        if author is None or group and group not in self.groups:
+            return None
+        return Post(
+            pk=record['id'],
+            author_id=author,
+            group_id=self.groups[group] if group else None,
+            text=record['text'],
+            pub_date=_date(record.get('pub_date')),
+            image=record.get('image', ''),
+        )
+
+    def _comment(self, record: dict) -> Optional[Comment]:
+        author = self.users.get(record['author'])
+        if author is None or record['post'] not in self.posts:
+            return None
+        return Comment(
+            pk=record['id'],
+            post_id=record['post'],
+            author_id=author,
+            text=record['text'],
+            created=_date(record.get('created')),
+        )
+
+    def _follow(self, record: dict) -> Optional[Follow]:
+        user = self.users.get(record['user'])
+        author = self.users.get(record['author'])
+        if user is None or author is None or user == author:
+            return None
+        return Follow(user_id=user, author_id=author)
+
+    @staticmethod
+    def _absent(model: type, objects: list) -> list:
+        """Объекты, чьих id ещё нет в базе."""
+        taken = set(
+            model.objects.filter(
+                pk__in=[obj.pk for obj in objects],
+            ).values_list('pk', flat=True),
+        )
+        return [obj for obj in objects if obj.pk not in taken]
+
+    def _new_posts(self, posts: list[Post]) -> list[Post]:
+        """Посты, которых ещё нет в базе; свои посты запоминаются.
+
+        Пост в базе с тем же id, автором и текстом загружен раньше этим
+        же импортом, и к нему можно привязывать комментарии.
+        """
+        existing = {
+            pk: (author, text)
+            for pk, author, text in Post.objects.filter(
+                pk__in=[post.pk for post in posts],
+            ).values_list('pk', 'author_id', 'text')
+        }
+        for post in posts:
+            own = (post.author_id, post.text)
+            if existing.get(post.pk, own) == own:
+                self.posts.add(post.pk)
+        return [post for post in posts if post.pk not in existing]
+
+    def _insert(
+        self,
+        model: type,
+        records: list,
+        build: Callable[[dict], Optional[object]],
+        new: Optional[Callable[[list], list]] = None,
+    ) -> list:
+        try:
+            objects = [build(record) for record in records]
+        except KeyError as error:
+            raise InvalidRecord(f'Нет обязательного поля {error}.') from error
+        created = [obj for obj in objects if obj is not None]
+        if new is not None:
+            # Даты из источника переписываются по pk, поэтому записи с
+            # занятым id не вставляются вовсе, а не гасятся конфликтом.
+            created = new(created)
+        self.stats.skipped += len(objects) - len(created)
+        bulk_create_with_dates(model, created, ignore_conflicts=True)
+        self.stats.rows += len(created)
+        return created
+
+    def _write(self, chunk: list[dict]) -> None:
+        by_type = {kind: [] for kind in ORDER}
+        for record in chunk:
+            if record.get('type') not in by_type:
+                raise InvalidRecord(f'Неизвестный тип записи: {record}')
+            by_type[record['type']].append(record)
+        users = self._insert(User, by_type['user'], self._user)
+        self.users.update(
+            User.objects.filter(
+                username__in=[user.username for user in users],
+            ).values_list('username', 'pk'),
+        )
+        groups = self._insert(Group, by_type['group'], self._group)
+        self.groups.update(
+            Group.objects.filter(
+                slug__in=[group.slug for group in groups],
+            ).values_list('slug', 'pk'),
+        )
+        self._insert(Post, by_type['post'], self._post, self._new_posts)
+        self._insert(
+            Comment,
+            by_type['comment'],
+            self._comment,
+            lambda comments: self._absent(Comment, comments),
+        )
+        self._insert(Follow, by_type['follow'], self._follow)
+
+    def run(
+        self,
+        lines: Iterable[str],
+        start: int = 0,
+        on_chunk: Callable[[int, Stats], None] = lambda line, stats: None,
+    ) -> Stats:
+        """Импортирует строки после start-й, сообщая о каждой порции."""
+        lines = iter(lines)
+        self._remember_posts(islice(lines, start))
+        self.stats.lines = start
+        while chunk := list(islice(lines, self.batch_size)):
+            records = [json.loads(line) for line in chunk if line.strip()]
+            with transaction.atomic():
+                self._write(records)
+            self.stats.lines += len(chunk)
+            on_chunk(self.stats.lines, self.stats)
+        return self.stats
+
+    def _remember_posts(self, lines: Iterable[str]) -> None:
+        """Находит посты, загруженные до позиции продолжения."""
+        while chunk := list(islice(lines, self.batch_size)):
+            records = [json.loads(line) for line in chunk if line.strip()]
+            posts = [
+                self._post(record)
+                for record in records
+                if record.get('type') == 'post'
+            ]
+            self._new_posts([post for post in posts if post is not None])
+
+
+def reset_sequences() -> None:
+    """Сдвигает счётчики id после вставки с явными первичными ключами."""
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(
+            no_style(),
+            [Post, Comment],
+        ):
+            cursor.execute(sql)
+
+
+def rebuild_derived() -> None:
+    """Пересчитывает всё, что импорт обошёл вместе с сигналами."""
+    reset_sequences()
+    counters.rebuild()
+    timeline.rebuild()
+    for _ in search.rebuild():
+        pass
+    feed_cache.bump()
+    conditional.invalidate()
+    feed_counts.invalidate()
+
+
+class Checkpoint:
+    """Номер последней импортированной строки в файле рядом с входом."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def load(self) -> int:
+        try:
+            return json.loads(self.path.read_text())['line']
+        except FileNotFoundError:
+            return 0
+
+    def save(self, line: int) -> None:
+        temporary = self.path.with_suffix('.tmp')
+        temporary.write_text(json.dumps({'line': line}))
+        temporary.replace(self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,67 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from django.core.management.base import BaseCommand
+
+from posts import images
+from posts.models import Post
+
+
+def read(item: tuple[int, str]) -> tuple[int, Optional[dict]]:
+    """Метаданные картинки поста; выполняется в процессе пула."""
+    pk, name = item
+    try:
+        return pk, images.stored_metadata(name)
+    except OSError:
+        return pk, None
+
+
+class Command(BaseCommand):
+    help = 'Заполняет размеры и формат картинок у старых постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Сколько процессов читают картинки.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько постов обновлять одним запросом.',
+        )
+
+    def handle(self, *args, **options):
+        posts = (
+            Post.objects.exclude(image='')
+            .filter(image_width__isnull=True)
+            .order_by('pk')
+            .values_list('pk', 'image')
+        )
+        done = failed = last = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            while batch := list(
+                posts.filter(pk__gt=last)[: options['batch_size']],
+            ):
+                last = batch[-1][0]
+                found = [
+                    Post(pk=pk, **values)
+                    for pk, values in pool.map(
+                        read,
+                        batch,
+                        chunksize=max(len(batch) // options['workers'], 1),
+                    )
+                    if values is not None
+                ]
+                Post.objects.bulk_update(found, images.METADATA_FIELDS)
+                done += len(found)
+                failed += len(batch) - len(found)
+                self.stdout.write(f'Обработано картинок: {done + failed}')
+        if failed:
+            self.stderr.write(f'Не удалось прочитать картинок: {failed}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Метаданные заполнены, картинок: {done}.'),
+        )
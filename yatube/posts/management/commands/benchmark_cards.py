@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает стоимость рендера карточки поста через {% include %} '
+        'в цикле и через posts.cards.render_cards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=10,
+            help='Число карточек на странице.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=200,
+            help='Сколько раз рендерить страницу.',
+        )
+
+    def handle(self, *args, **options):
+        report = benchmark.card_cost(options['count'], options['repeat'])
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,71 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет представления лент на наборах из 10^3, 10^5 и 10^6 '
+        'постов и выводит результат в JSON. Данные сеются во временную '
+        'тестовую базу, рабочая база не затрагивается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            nargs='+',
+            type=int,
+            default=[10**3, 10**5, 10**6],
+            help='Число постов в наборах данных.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Сколько раз запрашивать каждое представление.',
+        )
+        parser.add_argument(
+            '--views',
+            nargs='+',
+            help='Замерять только эти представления.',
+        )
+        parser.add_argument(
+            '--warm',
+            action='store_true',
+            help='Не очищать кэш перед запросами.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для результата вместо стандартного вывода.',
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            serialize=False,
+        )
+        try:
+            report = benchmark.run(
+                options['sizes'],
+                options['repeat'],
+                options['warm'],
+                options['views'],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        report = json.dumps(report, ensure_ascii=False, indent=2)
+        if not options['output']:
+            self.stdout.write(report)
+            return
+        with open(options['output'], 'w') as file:
+            file.write(report)
+        self.stdout.write(
+            self.style.SUCCESS(f'Результат записан в {options["output"]}.'),
+        )
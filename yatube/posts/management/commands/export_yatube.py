@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import exporter
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает посты или комментарии в JSONL или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(exporter.KINDS))
+        parser.add_argument(
+            '--format',
+            choices=exporter.FORMATS,
+            default='jsonl',
+            dest='output_format',
+        )
+        parser.add_argument('--since', help='Не раньше даты (ГГГГ-ММ-ДД).')
+        parser.add_argument('--until', help='Раньше даты (ГГГГ-ММ-ДД).')
+        parser.add_argument('--author', help='Имя пользователя автора.')
+        parser.add_argument('--group', help='Slug группы.')
+        parser.add_argument(
+            '--output',
+            help='Файл для выгрузки вместо стандартного вывода.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            objects = exporter.queryset(
+                options['kind'],
+                since=exporter.parse_moment(options['since']),
+                until=exporter.parse_moment(options['until']),
+                author=options['author'],
+                group=options['group'],
+            )
+        except ValueError as error:
+            raise CommandError(error) from error
+        lines = exporter.lines(
+            options['kind'],
+            objects,
+            options['output_format'],
+        )
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(
+            options['output'],
+            'w',
+            encoding='utf-8',
+            newline='',
+        ) as output:
+            output.writelines(lines)
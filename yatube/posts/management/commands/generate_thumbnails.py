@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры картинок всех постов.'
+
+    def handle(self, *args, **options):
+        names = (
+            Post.objects.exclude(image='')
+            .values_list('image', flat=True)
+            .iterator()
+        )
+        for count, name in enumerate(names, 1):
+            thumbnails.generate(name)
+            if not count % 100:
+                self.stdout.write(f'Обработано картинок: {count}')
+        self.stdout.write(self.style.SUCCESS('Миниатюры созданы.'))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from posts import conditional, feed_cache, images
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Переносит картинки постов в хранилище с именами по содержимому.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько имён файлов читать одним запросом.',
+        )
+
+    def handle(self, *args, **options):
+        names = (
+            Post.objects.exclude(image='')
+            .order_by('image')
+            .values_list('image', flat=True)
+            .distinct()
+        )
+        moved = missing = 0
+        last = ''
+        while batch := list(
+            names.filter(image__gt=last)[: options['batch_size']],
+        ):
+            last = batch[-1]
+            for name in batch:
+                if images.storage.is_content_name(name):
+                    continue
+                try:
+                    images.move_to_storage(name)
+                except FileNotFoundError:
+                    missing += 1
+                    continue
+                moved += 1
+            self.stdout.write(f'Перенесено файлов: {moved}')
+        feed_cache.bump()
+        conditional.invalidate()
+        if missing:
+            self.stderr.write(f'Не найдено файлов: {missing}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Картинки перенесены, файлов: {moved}.'),
+        )
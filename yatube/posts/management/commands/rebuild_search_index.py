@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Заново заполняет полнотекстовый индекс постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.SEARCH_BATCH_SIZE,
+            help='Сколько постов индексировать в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stderr.write('Поиск поддерживается только на SQLite.')
+            return
+        done = 0
+        for done in search.rebuild(options['batch_size']):
+            self.stdout.write(f'Проиндексировано постов: {done}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Индекс перестроен, постов: {done}.'),
+        )
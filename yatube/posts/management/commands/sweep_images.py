@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import images
+
+
+class Command(BaseCommand):
+    help = 'Удаляет картинки постов, на которые больше никто не ссылается.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace',
+            type=float,
+            default=settings.IMAGE_SWEEP_GRACE,
+            help='Сколько секунд хранить файл без ссылок.',
+        )
+
+    def handle(self, *args, **options):
+        deleted = images.storage.sweep(options['grace'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Удалено файлов: {deleted}.'),
+        )
@@ -0,0 +1,83 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:26
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+def remove_invalid_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    Follow.objects.filter(user=models.F('author')).delete()
+    # 0009 уже построила ленты и по подпискам на себя.
+    TimelineEntry.objects.filter(user=models.F('post__author')).delete()
+    Follow.objects.exclude(
+        pk__in=Follow.objects.values('user', 'author')
+        .annotate(first_pk=models.Min('pk'))
+        .values('first_pk'),
+    ).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('posts', '0009_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(
+                fields=['post', '-created'], name='comment_post_created_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['-pub_date', '-id'], name='post_pub_date_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx',
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name='timelineentry',
+            name='timeline_user_pub_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx',
+            ),
+        ),
+        migrations.RunPython(
+            remove_invalid_follows,
+            migrations.RunPython.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'author'), name='unique_follow'
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    _negated=True,
+                    user=django.db.models.expressions.F('author'),
+                ),
+                name='prevent_self_follow',
+            ),
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import posts.models
+
+TRIGGERS = (
+    '''
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert
+    AFTER INSERT ON posts_post
+    BEGIN
+        INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete
+    AFTER DELETE ON posts_post
+    BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_update
+    AFTER UPDATE OF text ON posts_post
+    BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    ''',
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        '''
+        CREATE VIRTUAL TABLE posts_post_fts USING fts5(
+            text,
+            content='posts_post',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        '''
+    )
+    for trigger in TRIGGERS:
+        schema_editor.execute(trigger)
+    schema_editor.execute(
+        "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in ('insert', 'delete', 'update'):
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS posts_post_fts_{name}')
+    schema_editor.execute('DROP TABLE IF EXISTS posts_post_fts')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('posts', '0012_comment_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearch',
+            fields=[
+                (
+                    'post',
+                    models.OneToOneField(
+                        db_column='rowid',
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name='search_index',
+                        serialize=False,
+                        to='posts.Post',
+                        verbose_name='пост',
+                    ),
+                ),
+                ('text', posts.models.SearchField(verbose_name='текст поста')),
+                ('rank', models.FloatField(verbose_name='релевантность')),
+            ],
+            options={
+                'verbose_name': 'поисковый индекс поста',
+                'verbose_name_plural': 'поисковый индекс постов',
+                'db_table': 'posts_post_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
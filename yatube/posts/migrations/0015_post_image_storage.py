@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:59
+
+from django.db import migrations, models
+
+import posts.storage
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('posts', '0014_post_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(
+                blank=True,
+                storage=posts.storage.ContentAddressedStorage(),
+                upload_to='posts/',
+                verbose_name='картинка',
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('posts', '0016_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['pub_date', 'updated_at'], name='post_modified_idx'
+            ),
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.db import models
 from django.urls import reverse
 
+from posts.storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -37,13 +39,67 @@ class Post(models.Model):
         on_delete=models.SET_NULL,
         verbose_name='группа',
     )
-    image = models.ImageField('картинка', upload_to='posts/', blank=True)
+    image = models.ImageField(
+        'картинка',
+        upload_to='posts/',
+        storage=ContentAddressedStorage(),
+        blank=True,
+        # По имени файла считаются ссылки на него и переключаются посты
+        # после обработки картинки.
+        db_index=True,
+    )
+    # Заполняются при загрузке, а не через width_field и height_field:
+    # те открывают файл при каждой загрузке поста без размеров.
+    image_width = models.PositiveIntegerField(
+        'ширина картинки',
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    image_height = models.PositiveIntegerField(
+        'высота картинки',
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    image_format = models.CharField(
+        'формат картинки',
+        max_length=10,
+        blank=True,
+        editable=False,
+    )
+    # Версия карточки поста в ленте: меняется и при правке автора или
+    # группы, и при появлении миниатюры.
+    updated_at = models.DateTimeField('дата изменения', auto_now=True)
+    comment_count = models.PositiveIntegerField(
+        'число комментариев',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'пост'
         verbose_name_plural = 'посты'
         ordering = ('-pub_date',)
         default_related_name = 'posts'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'), name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_pub_date_idx',
+            ),
+            # Покрывает валидатор всей ленты (даты и число постов).
+            models.Index(
+                fields=('pub_date', 'updated_at'),
+                name='post_modified_idx',
+            ),
+        )
 
     def __str__(self) -> str:
         return self.text[:settings.SHOW_WORDS]  # fmt: skip
@@ -73,6 +129,12 @@ class Comment(models.Model):
         verbose_name_plural = 'комментарии'
         ordering = ('-created',)
         default_related_name = 'comments'
+        indexes = (
+            models.Index(
+                fields=('post', '-created', '-id'),
+                name='comment_post_created_idx',
+            ),
+        )
 
     def __str__(self) -> str:
         return self.text[:settings.SHOW_WORDS]  # fmt: skip
@@ -95,6 +157,113 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'подписчик'
         verbose_name_plural = 'подписчики'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='prevent_self_follow',
+            ),
+        )
 
     def __str__(self) -> str:
         return self.user.get_username()[:settings.SHOW_WORDS]  # fmt: skip
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='пост',
+    )
+    pub_date = models.DateTimeField('дата и время публикации')
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'записи ленты'
+        ordering = ('-pub_date',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_user_pub_date_idx',
+            ),
+        )
+
+    def __str__(self) -> str:
+        return str(self.post)
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='пользователь',
+    )
+    posts_count = models.PositiveIntegerField('число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'число подписчиков',
+        default=0,
+    )
+    following_count = models.PositiveIntegerField('число подписок', default=0)
+
+    class Meta:
+        verbose_name = 'статистика пользователя'
+        verbose_name_plural = 'статистика пользователей'
+
+    def __str__(self) -> str:
+        return self.user.get_username()[:settings.SHOW_WORDS]  # fmt: skip
+
+
+class SearchField(models.TextField):
+    """Колонка полнотекстового индекса SQLite FTS5."""
+
+
+@SearchField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class PostSearch(models.Model):
+    """Полнотекстовый индекс постов (виртуальная таблица FTS5).
+
+    Таблица создаётся миграцией и обновляется триггерами на posts_post.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index',
+        verbose_name='пост',
+    )
+    text = SearchField('текст поста')
+    rank = models.FloatField('релевантность')
+
+    class Meta:
+        managed = False
+        db_table = 'posts_post_fts'
+        verbose_name = 'поисковый индекс поста'
+        verbose_name_plural = 'поисковый индекс постов'
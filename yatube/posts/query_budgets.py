@@ -0,0 +1,112 @@
+"""Бюджеты SQL-запросов для страниц приложения posts.
+
+BUDGETS задаёт для каждого адреса posts: наибольшее допустимое число
+запросов при GET. Тест test_query_budgets открывает все адреса на
+маленьком и большом наборах данных и падает, если бюджет превышен или
+число запросов растёт вместе с числом записей. QueryRecorder
+запоминает для каждого запроса место в шаблоне и в коде, чтобы в
+отчёте было видно, откуда взялся лишний запрос.
+"""
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.template.base import Node
+
+BUDGETS = {
+    'posts:h_page': 5,
+    'posts:post_create': 3,
+    'posts:follow_index': 4,
+    'posts:search': 3,
+    'posts:page_post': 6,
+    'posts:post_detail': 7,
+    'posts:post_edit': 4,
+    'posts:profile': 7,
+    'posts:profile_follow': 7,
+    'posts:profile_unfollow': 9,
+    'posts:followers': 5,
+    'posts:following': 5,
+    'posts:add_comment': 3,
+    'posts:comments': 2,
+    'posts:api_index': 2,
+    'posts:api_posts_by_ids': 2,
+    'posts:api_post_detail': 3,
+    'posts:api_group_posts': 3,
+    'posts:api_profile': 3,
+    'posts:api_follow_index': 3,
+    'posts:api_following_ids': 3,
+    'posts:export': 3,
+}
+
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+IN_LIST = re.compile(r'\((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)')
+
+
+def normalize(sql: str) -> str:
+    """Шаблон запроса без литералов и с IN (...) любой длины."""
+    return IN_LIST.sub('(...)', LITERAL.sub('?', sql))
+
+
+def _frames(frame) -> Iterator:
+    while frame:
+        yield frame
+        frame = frame.f_back
+
+
+def _template_line(frames: list) -> Optional[str]:
+    for frame in frames:
+        node = frame.f_locals.get('self')
+        # type() вместо isinstance(): не раскрывать ленивые объекты.
+        if issubclass(type(node), Node) and node.origin and node.token:
+            return f'{node.origin.template_name}:{node.token.lineno}'
+    return None
+
+
+def _code_line(frames: list) -> Optional[str]:
+    for frame in frames:
+        path = Path(frame.f_code.co_filename)
+        if settings.BASE_DIR in path.parents:
+            return f'{path.relative_to(settings.BASE_DIR)}:{frame.f_lineno}'
+    return None
+
+
+class QueryRecorder:
+    """Обёртка выполнения запросов, запоминающая их источник."""
+
+    def __init__(self) -> None:
+        self.queries: list[dict] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        frames = list(_frames(sys._getframe(1)))
+        self.queries.append(
+            {
+                'sql': sql,
+                'template': _template_line(frames),
+                'code': _code_line(frames),
+            },
+        )
+        return execute(sql, params, many, context)
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+    def patterns(self) -> Counter:
+        return Counter(normalize(query['sql']) for query in self.queries)
+
+
+def growth(small: QueryRecorder, large: QueryRecorder) -> list[dict]:
+    """Запросы, которых на большом наборе данных стало больше."""
+    grown = large.patterns() - small.patterns()
+    report = []
+    for pattern, extra in grown.items():
+        example = next(
+            query
+            for query in large.queries
+            if normalize(query['sql']) == pattern
+        )
+        report.append({'extra': extra, **example})
+    return report
@@ -0,0 +1,137 @@
+"""Полнотекстовый поиск по постам на SQLite FTS5.
+
+Индекс posts_post_fts хранит только токены текста (external content),
+а сами тексты читаются из posts_post. Синхронность поддерживают
+триггеры: они срабатывают и на bulk_create/update(), которые обходят
+сигналы Django.
+"""
+import re
+from typing import Iterator
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.models import F, FloatField, Max, QuerySet, Value
+
+from posts.models import Post, PostSearch
+
+TABLE = PostSearch._meta.db_table
+
+# Перестройка posts_post в SQLite (ALTER через копию таблицы) удаляет
+# триггеры, поэтому они пересоздаются после каждой миграции.
+TRIGGERS = (
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {TABLE}_insert AFTER INSERT ON posts_post
+    BEGIN
+        INSERT INTO {TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {TABLE}_delete AFTER DELETE ON posts_post
+    BEGIN
+        INSERT INTO {TABLE}({TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {TABLE}_update
+    AFTER UPDATE OF text ON posts_post
+    BEGIN
+        INSERT INTO {TABLE}({TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    ''',
+)
+
+WORD = re.compile(r'\w+')
+
+
+def is_supported(using: str = DEFAULT_DB_ALIAS) -> bool:
+    return connections[using].vendor == 'sqlite'
+
+
+def install_triggers(using: str = DEFAULT_DB_ALIAS) -> None:
+    if not is_supported(using):
+        return
+    with connections[using].cursor() as cursor:
+        if TABLE not in connections[using].introspection.table_names(cursor):
+            return
+        for trigger in TRIGGERS:
+            cursor.execute(trigger)
+
+
+def drop_triggers(using: str = DEFAULT_DB_ALIAS) -> None:
+    """Отключает синхронизацию индекса, например на время импорта.
+
+    После этого индекс нужно перестроить через rebuild().
+    """
+    if not is_supported(using):
+        return
+    with connections[using].cursor() as cursor:
+        for action in ('insert', 'delete', 'update'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {TABLE}_{action}')
+
+
+def to_match_query(text: str) -> str:
+    """Запрос FTS5 из пользовательского ввода: все слова, каждое в кавычках.
+
+    Кавычки отключают синтаксис FTS5 (AND, NEAR, * и т. п.), поэтому
+    никакой ввод не приводит к ошибке разбора запроса.
+    """
+    return ' '.join(f'"{word}"' for word in WORD.findall(text))
+
+
+def search(queryset: QuerySet, text: str) -> QuerySet:
+    """Посты, подходящие под запрос, с релевантностью в поле score.
+
+    Чем больше score, тем выше пост в выдаче.
+    """
+    query = to_match_query(text)
+    if not query:
+        return queryset.annotate(
+            score=Value(0.0, output_field=FloatField()),
+        ).none()
+    if not is_supported():
+        return queryset.filter(text__icontains=text).annotate(
+            score=Value(0.0, output_field=FloatField()),
+        )
+    return queryset.filter(search_index__text__match=query).annotate(
+        score=F('search_index__rank') * -1,
+    )
+
+
+def _batches(batch_size: int) -> Iterator[tuple[int, int]]:
+    # Посты новее начала перестройки уже проиндексированы триггером.
+    posts = Post.objects.filter(
+        pk__lte=Post.objects.aggregate(last=Max('pk'))['last'] or 0,
+    ).order_by('pk')
+    last_pk = 0
+    while pks := list(
+        posts.filter(pk__gt=last_pk).values_list('pk', flat=True)[:batch_size],
+    ):
+        yield pks[0], pks[-1]
+        last_pk = pks[-1]
+
+
+def rebuild(batch_size: int = settings.SEARCH_BATCH_SIZE) -> Iterator[int]:
+    """Заново заполняет индекс порциями, отдавая число обработанных постов.
+
+    Каждая порция пишется в своей транзакции, чтобы не держать
+    блокировку базы на всё время перестройки. Посты, созданные во время
+    перестройки, индексирует триггер; править посты в это время нельзя.
+    """
+    install_triggers()
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('delete-all')")
+    done = 0
+    for first_pk, last_pk in _batches(batch_size):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {TABLE}(rowid, text) '
+                'SELECT id, text FROM posts_post WHERE id BETWEEN %s AND %s',
+                (first_pk, last_pk),
+            )
+            done += cursor.rowcount
+        yield done
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
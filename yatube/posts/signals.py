@@ -0,0 +1,183 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from posts import (
+    conditional,
+    counters,
+    feed_cache,
+    feed_counts,
+    images,
+    search,
+    timeline,
+)
+from posts.models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Post, dispatch_uid='posts_timeline_push')
+def push_post_to_timelines(sender, instance: Post, created: bool, **kwargs):
+    if created and not kwargs.get('raw'):
+        timeline.push_post(instance)
+
+
+@receiver(post_save, sender=Post, dispatch_uid='posts_feed_save_post')
+@receiver(post_delete, sender=Post, dispatch_uid='posts_feed_delete_post')
+@receiver(post_save, sender=Comment, dispatch_uid='posts_feed_save_comment')
+@receiver(
+    post_delete,
+    sender=Comment,
+    dispatch_uid='posts_feed_delete_comment',
+)
+@receiver(post_save, sender=Group, dispatch_uid='posts_feed_save_group')
+@receiver(post_delete, sender=Group, dispatch_uid='posts_feed_delete_group')
+def invalidate_feed_cache(sender, **kwargs):
+    feed_cache.bump()
+
+
+@receiver(pre_save, sender=Post, dispatch_uid='posts_validators_move_post')
+def bump_previous_group(sender, instance: Post, **kwargs):
+    # Пост могли перенести в другую группу: старая лента тоже меняется.
+    if instance.pk is not None and not kwargs.get('raw'):
+        previous = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', 'group__slug')
+            .first()
+        )
+        if previous is None:
+            return
+        group_id, slug = previous
+        if slug:
+            conditional.bump('group', slug)
+        if group_id != instance.group_id:
+            if group_id:
+                feed_counts.change('group', group_id, -1)
+            if instance.group_id:
+                feed_counts.change('group', instance.group_id, 1)
+
+
+@receiver(post_save, sender=Post, dispatch_uid='posts_counts_save_post')
+def count_created_post(sender, instance: Post, created: bool, **kwargs):
+    if created and not kwargs.get('raw'):
+        counters.change_user_stats(instance.author_id, posts_count=1)
+        feed_counts.change('index', '', 1)
+        feed_counts.change('author', instance.author_id, 1)
+        if instance.group_id:
+            feed_counts.change('group', instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post, dispatch_uid='posts_counts_delete_post')
+def count_deleted_post(sender, instance: Post, **kwargs):
+    feed_counts.change('index', '', -1)
+    feed_counts.change('author', instance.author_id, -1)
+    if instance.group_id:
+        feed_counts.change('group', instance.group_id, -1)
+    # Без rebuild_user_stats: автора могут удалять вместе с постами.
+    UserStats.objects.filter(
+        user_id=instance.author_id,
+        posts_count__gt=0,
+    ).update(posts_count=F('posts_count') - 1)
+    feed_counts.forget(
+        'follow',
+        Follow.objects.filter(author_id=instance.author_id).values_list(
+            'user_id',
+            flat=True,
+        ),
+    )
+
+
+@receiver(pre_save, sender=Post, dispatch_uid='posts_image_metadata')
+def record_image_metadata(sender, instance: Post, **kwargs):
+    if not kwargs.get('raw'):
+        images.record_metadata(instance)
+
+
+@receiver(post_save, sender=Post, dispatch_uid='posts_validators_save_post')
+@receiver(
+    post_delete,
+    sender=Post,
+    dispatch_uid='posts_validators_delete_post',
+)
+def bump_post_validators(sender, instance: Post, **kwargs):
+    conditional.bump_post(
+        instance.pk,
+        instance.author_id,
+        instance.author.username,
+        instance.group.slug if instance.group_id else None,
+    )
+
+
+@receiver(
+    post_save,
+    sender=Comment,
+    dispatch_uid='posts_validators_save_comment',
+)
+@receiver(
+    post_delete,
+    sender=Comment,
+    dispatch_uid='posts_validators_delete_comment',
+)
+def bump_comment_validators(sender, instance: Comment, **kwargs):
+    conditional.bump('post', instance.post_id)
+
+
+@receiver(post_save, sender=Group, dispatch_uid='posts_validators_save_group')
+@receiver(
+    post_delete,
+    sender=Group,
+    dispatch_uid='posts_validators_delete_group',
+)
+def bump_group_validators(sender, instance: Group, **kwargs):
+    conditional.bump('index')
+    conditional.bump('group', instance.slug)
+
+
+@receiver(
+    post_save,
+    sender=Follow,
+    dispatch_uid='posts_validators_save_follow',
+)
+@receiver(
+    post_delete,
+    sender=Follow,
+    dispatch_uid='posts_validators_delete_follow',
+)
+def bump_follow_validators(sender, instance: Follow, **kwargs):
+    conditional.bump_user(instance.author_id, instance.author.username)
+    conditional.bump_user(instance.user_id, instance.user.username)
+
+
+# Поля автора и группы, которые выводятся в карточке поста.
+CARD_FIELDS = {
+    User: {'username', 'first_name', 'last_name'},
+    Group: {'title', 'slug'},
+}
+
+
+@receiver(post_save, sender=User, dispatch_uid='posts_cards_save_user')
+@receiver(post_save, sender=Group, dispatch_uid='posts_cards_save_group')
+def refresh_post_cards(sender, instance, created: bool, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if created or update_fields and not CARD_FIELDS[sender] & update_fields:
+        return
+    field = 'author' if sender is User else 'group'
+    Post.objects.filter(**{field: instance}).update(updated_at=timezone.now())
+    feed_cache.bump()
+    # Имя видно на всех страницах с постами автора или группы, поэтому
+    # сбрасываются валидаторы всех областей, а не только ленты.
+    transaction.on_commit(conditional.invalidate)
+
+
+@receiver(post_migrate, dispatch_uid='posts_search_triggers')
+def restore_search_triggers(sender, using: str, **kwargs):
+    if sender.label == 'posts':
+        search.install_triggers(using)
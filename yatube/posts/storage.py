@@ -0,0 +1,118 @@
+"""Хранилище картинок постов с адресацией по содержимому.
+
+Имя файла — SHA-256 содержимого с исходным расширением, разложенное
+по двум уровням подкаталогов (posts/ab/cd/abcd….jpg), поэтому ни один
+каталог не разрастается. Одинаковые файлы хранятся один раз: при
+повторной загрузке возвращается имя уже сохранённого файла. Файл без
+ссылок нельзя удалить сразу: его могла только что переиспользовать
+загрузка, пост которой ещё не сохранён. Поэтому delete() ничего не
+делает, а файлы, на которые давно никто не ссылается, удаляет sweep()
+(команда sweep_images). Проверка ссылок и удаление в sweep() идут под
+той же блокировкой, под которой save() переиспользует файл и обновляет
+его время изменения.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from django.apps import apps
+from django.core.files import File, locks
+from django.core.files.storage import FileSystemStorage
+from django.db.models import FileField
+
+CONTENT_NAME = re.compile(r'(^|/)([0-9a-f]{2})/([0-9a-f]{2})/\2\3[0-9a-f]{60}')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    @staticmethod
+    def is_content_name(name: str) -> bool:
+        return bool(CONTENT_NAME.search(name))
+
+    @staticmethod
+    def content_name(name: str, content: File) -> str:
+        """Имя файла по содержимому в каталоге из name."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory = posixpath.dirname(name)
+        if CONTENT_NAME.search(name):
+            directory = posixpath.dirname(posixpath.dirname(directory))
+        return posixpath.join(
+            directory,
+            digest[:2],
+            digest[2:4],
+            digest + posixpath.splitext(name)[1].lower(),
+        )
+
+    def save(self, name, content, max_length=None) -> str:
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        with self._lock():
+            if self.exists(name):
+                os.utime(self.path(name))
+                return name
+        try:
+            return self._save(name, content)
+        except FileExistsError:
+            return name
+
+    def get_available_name(self, name, max_length=None) -> str:
+        # Вызывается из _save, только если такой же файл успели сохранить
+        # параллельно: второй раз его писать не нужно.
+        raise FileExistsError(name)
+
+    def references(self, name: str) -> int:
+        """Сколько записей ссылается на файл."""
+        return sum(
+            model._base_manager.filter(**{field.name: name}).count()
+            for model in apps.get_models()
+            for field in model._meta.concrete_fields
+            if isinstance(field, FileField)
+            and isinstance(field.storage, ContentAddressedStorage)
+        )
+
+    def delete(self, name: str) -> None:
+        # Файлы без ссылок удаляет sweep().
+        pass
+
+    def sweep(self, grace: float) -> int:
+        """Удаляет файлы без ссылок старше grace секунд и считает их."""
+        deadline = time.time() - grace
+        deleted = 0
+        for name in self._content_names():
+            with self._lock():
+                if os.path.getmtime(self.path(name)) > deadline:
+                    continue
+                if self.references(name):
+                    continue
+                super().delete(name)
+            deleted += 1
+        return deleted
+
+    def _content_names(self) -> Iterator[str]:
+        for root, _, files in os.walk(self.location):
+            directory = os.path.relpath(root, self.location)
+            for file in files:
+                name = posixpath.normpath(
+                    posixpath.join(*directory.split(os.sep), file),
+                )
+                if self.is_content_name(name):
+                    yield name
+
+    @contextmanager
+    def _lock(self) -> Iterator[None]:
+        os.makedirs(self.location, exist_ok=True)
+        with open(os.path.join(self.location, '.storage.lock'), 'wb') as file:
+            locks.lock(file, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(file)
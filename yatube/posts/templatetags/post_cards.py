@@ -0,0 +1,15 @@
+from django import template
+from django.utils.safestring import SafeString
+
+from posts import cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts, group_link: bool = False) -> list[SafeString]:
+    """Карточки постов страницы из кэша, недостающие рендерятся.
+
+    {% post_cards page_obj group_link=True as cards %}
+    """
+    return cards.render(posts, group_link)
@@ -0,0 +1,97 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+NUMBER_TEST_POSTS = 13
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = mixer.blend(User)
+        cls.reader = mixer.blend(User)
+        cls.group = mixer.blend('posts.Group')
+        for _ in range(NUMBER_TEST_POSTS):
+            Post.objects.create(
+                author=cls.author,
+                group=cls.group,
+                text='текст',
+            )
+        cls.post = Post.objects.order_by('-pub_date', '-pk').first()
+        Comment.objects.create(post=cls.post, author=cls.reader, text='ок')
+        cls.reader_client = cls.client_class()
+        cls.reader_client.force_login(cls.reader)
+        cls.reader_client.get(
+            reverse('posts:profile_follow', args=(cls.author.username,)),
+        )
+
+    def test_feeds_page_by_cursor(self):
+        """Ленты отдаются страницами по курсору без повторов."""
+        for url in (
+            reverse('posts:api_index'),
+            reverse('posts:api_group_posts', args=(self.group.slug,)),
+            reverse('posts:api_profile', args=(self.author.username,)),
+            reverse('posts:api_follow_index'),
+        ):
+            with self.subTest(url=url):
+                first = self.reader_client.get(url).json()
+                second = self.reader_client.get(
+                    url,
+                    {'cursor': first['next_cursor']},
+                ).json()
+                ids = [row['id'] for row in first['results']]
+                ids += [row['id'] for row in second['results']]
+                self.assertEqual(len(ids), NUMBER_TEST_POSTS)
+                self.assertEqual(len(set(ids)), NUMBER_TEST_POSTS)
+                self.assertIsNone(second['next_cursor'])
+
+    def test_post_projection(self):
+        """Пост отдаётся плоским словарём с автором и группой."""
+        data = self.client.get(
+            reverse('posts:api_post_detail', args=(self.post.pk,)),
+        ).json()
+        self.assertEqual(data['id'], self.post.pk)
+        self.assertEqual(data['username'], self.author.username)
+        self.assertEqual(data['group_slug'], self.group.slug)
+        self.assertIsNone(data['image'])
+        self.assertEqual(
+            [comment['username'] for comment in data['comments']['results']],
+            [self.reader.username],
+        )
+
+    def test_posts_by_ids_keeps_order(self):
+        """Посты по списку id приходят в порядке запроса."""
+        pks = list(Post.objects.values_list('pk', flat=True)[:3])[::-1]
+        response = self.client.get(
+            reverse('posts:api_posts_by_ids'),
+            {'ids': ','.join(map(str, [*pks, 10**6]))},
+        )
+        self.assertEqual(
+            [row['id'] for row in response.json()['results']],
+            pks,
+        )
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:api_posts_by_ids'),
+                {'ids': '1,x'},
+            ).status_code,
+            400,
+        )
+
+    def test_errors_are_json(self):
+        """Ошибки API отдаются в JSON с нужным статусом."""
+        for url, status in (
+            (reverse('posts:api_follow_index'), 401),
+            (reverse('posts:api_post_detail', args=(10**6,)), 404),
+            (reverse('posts:api_group_posts', args=('nope',)), 404),
+            (reverse('posts:api_profile', args=('nope',)), 404),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', response.json())
@@ -0,0 +1,34 @@
+from django.test import TestCase
+
+from posts import benchmark
+from posts.models import Post, TimelineEntry
+
+
+class BenchmarkTest(TestCase):
+    def test_run_reports_every_view_per_size(self):
+        """Замер досевает данные и отчитывается по каждому представлению."""
+        report = benchmark.run([20, 40], repeat=2)
+        self.assertEqual(set(report['results']), {'20', '40'})
+        self.assertEqual(Post.objects.count(), 40)
+        self.assertTrue(TimelineEntry.objects.exists())
+        for views in report['results'].values():
+            self.assertEqual(
+                set(views),
+                {
+                    'index',
+                    'index_deep',
+                    'group_posts',
+                    'profile',
+                    'post_detail',
+                    'follow_index',
+                },
+            )
+            for result in views.values():
+                self.assertGreater(result['queries'], 0)
+                self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+
+    def test_card_cost_compares_renderers(self):
+        """Замер карточек сообщает стоимость обоих способов рендера."""
+        report = benchmark.card_cost(count=3, repeat=2)
+        self.assertGreater(report['include_us_per_card'], 0)
+        self.assertGreater(report['compiled_us_per_card'], 0)
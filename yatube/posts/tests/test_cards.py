@@ -0,0 +1,109 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import engines
+from django.test import TestCase
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from posts import benchmark, cards, feed_cache
+from posts.models import Post
+
+User = get_user_model()
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = mixer.blend(User, first_name='Лев', last_name='Толстой')
+        cls.group = mixer.blend('posts.Group', title='Романы')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='Все счастливые семьи',
+        )
+        cls.url = reverse('posts:h_page')
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def feed(self) -> str:
+        # Страница ленты собирается заново, карточки — из своего кэша.
+        feed_cache.bump()
+        return self.client.get(self.url).content.decode()
+
+    def test_cards_rendered_once(self):
+        """Карточки берутся из кэша одним get_many без рендеринга."""
+        self.feed()
+        with mock.patch.object(
+            cards,
+            'render_cards',
+            wraps=cards.render_cards,
+        ) as render, mock.patch.object(
+            cards.cache,
+            'get_many',
+            wraps=cards.cache.get_many,
+        ) as get_many:
+            self.assertIn(self.post.text, self.feed())
+        render.assert_not_called()
+        get_many.assert_called_once()
+
+    def test_card_follows_post_author_and_group(self):
+        """Правка поста, имени автора и группы видна в карточке."""
+        self.feed()
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertIn('Новый текст', self.feed())
+        self.author.first_name = 'Лёва'
+        self.author.save()
+        self.assertIn('Лёва', self.feed())
+        self.group.title = 'Повести'
+        self.group.save()
+        self.assertIn('Повести', self.feed())
+
+    def test_login_keeps_cards(self):
+        """Вход пользователя не сбрасывает карточки его постов."""
+        updated_at = Post.objects.get(pk=self.post.pk).updated_at
+        self.client.force_login(self.author)
+        self.author.refresh_from_db()
+        self.author.save(update_fields=('last_login',))
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).updated_at,
+            updated_at,
+        )
+
+
+class RenderCardsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.group = mixer.blend('posts.Group')
+        cls.authors = mixer.cycle(2).blend(User)
+        for number in range(6):
+            Post.objects.create(
+                author=cls.authors[number % 2],
+                group=cls.group,
+                text=f'пост {number}',
+            )
+
+    def test_same_html_as_include_loop(self):
+        """Карточки совпадают с include post.html в цикле."""
+        posts = list(Post.objects.select_related('author', 'group'))
+        for post in posts:
+            post.thumbnail = None
+        include_loop = engines['django'].from_string(benchmark.INCLUDE_LOOP)
+        with mock.patch.object(
+            cards,
+            'reverse',
+            wraps=cards.reverse,
+        ) as reverse_url:
+            rendered = cards.render_cards(
+                ((post, post is posts[-1]) for post in posts),
+                group_link=True,
+            )
+        self.assertEqual(
+            ''.join(rendered),
+            include_loop.render({'posts': posts}),
+        )
+        self.assertEqual(reverse_url.call_count, 3)
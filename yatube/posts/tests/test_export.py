@@ -0,0 +1,120 @@
+import csv
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = mixer.blend(User)
+        cls.other = mixer.blend(User)
+        cls.group = mixer.blend('posts.Group')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='Пост, с "кавычками"',
+        )
+        cls.old_post = Post.objects.create(author=cls.other, text='старый')
+        Post.objects.filter(pk=cls.old_post.pk).update(
+            pub_date=timezone.now() - timedelta(days=30),
+        )
+        Comment.objects.create(post=cls.post, author=cls.other, text='ок')
+        cls.staff = User.objects.create_user('staff', is_staff=True)
+
+    def setUp(self) -> None:
+        self.staff_client = self.client_class()
+        self.staff_client.force_login(self.staff)
+
+    def export(self, *args, **options) -> str:
+        out = StringIO()
+        call_command('export_yatube', *args, stdout=out, **options)
+        return out.getvalue()
+
+    def test_jsonl_matches_import_format(self):
+        """JSONL-выгрузка совпадает с форматом import_yatube."""
+        records = [
+            json.loads(line) for line in self.export('posts').splitlines()
+        ]
+        self.assertEqual(
+            [record['id'] for record in records],
+            [self.post.pk, self.old_post.pk],
+        )
+        self.assertEqual(records[0]['type'], 'post')
+        self.assertEqual(records[0]['author'], self.author.username)
+        self.assertEqual(records[0]['group'], self.group.slug)
+        self.assertEqual(records[0]['text'], self.post.text)
+        comment = json.loads(self.export('comments'))
+        self.assertEqual(
+            (comment['type'], comment['post'], comment['author']),
+            ('comment', self.post.pk, self.other.username),
+        )
+
+    def test_filters(self):
+        """Выгрузку можно ограничить датами, автором и группой."""
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        for options, expected in (
+            ({'since': since}, [self.post.pk]),
+            ({'until': since}, [self.old_post.pk]),
+            ({'author': self.other.username}, [self.old_post.pk]),
+            ({'group': self.group.slug}, [self.post.pk]),
+        ):
+            with self.subTest(options=options):
+                lines = self.export('posts', **options).splitlines()
+                self.assertEqual(
+                    [json.loads(line)['id'] for line in lines],
+                    expected,
+                )
+
+    def test_csv_to_file(self):
+        """CSV пишется в файл с заголовком и экранированием."""
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = directory / 'posts.csv'
+        self.export('posts', output_format='csv', output=str(path))
+        with path.open(encoding='utf-8', newline='') as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['text'], self.post.text)
+
+    def test_endpoint_streams_for_staff_only(self):
+        """Адрес выгрузки доступен только персоналу и отдаёт поток."""
+        url = reverse('posts:export', args=('comments',))
+        reader_client = self.client_class()
+        reader_client.force_login(self.other)
+        self.assertEqual(reader_client.get(url).status_code, 302)
+        response = self.staff_client.get(url, {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(
+            content.splitlines()[0], 'id,post,author,text,created'
+        )
+        self.assertIn('ок', content)
+
+    def test_endpoint_rejects_unknown_kind_and_dates(self):
+        """Неизвестный тип выгрузки и неверная дата дают 400."""
+        for url, params in (
+            (reverse('posts:export', args=('users',)), {}),
+            (reverse('posts:export', args=('posts',)), {'since': 'вчера'}),
+            (reverse('posts:export', args=('posts',)), {'format': 'xml'}),
+        ):
+            with self.subTest(url=url, params=params):
+                self.assertEqual(
+                    self.staff_client.get(url, params).status_code,
+                    400,
+                )
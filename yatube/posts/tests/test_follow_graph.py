@@ -0,0 +1,145 @@
+import re
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from posts import follow_graph
+from posts.models import Follow, Post, TimelineEntry, UserStats
+
+User = get_user_model()
+
+
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.reader, cls.author = mixer.cycle(2).blend(User)
+        cls.post = Post.objects.create(author=cls.author, text='текст')
+
+    def setUp(self) -> None:
+        self.client.force_login(self.reader)
+
+    def stats(self, user: User) -> tuple[int, int]:
+        stats = UserStats.objects.get(user=user)
+        return stats.followers_count, stats.following_count
+
+    def statements(self, queries: CaptureQueriesContext) -> list[str]:
+        return [
+            query['sql']
+            for query in queries.captured_queries
+            if 'SAVEPOINT' not in query['sql']
+        ]
+
+    def test_follow_and_unfollow_are_idempotent(self):
+        """Повторные подписка и отписка ничего не меняют."""
+        self.assertTrue(follow_graph.follow(self.reader, self.author))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertFalse(follow_graph.follow(self.reader, self.author))
+        self.assertEqual(len(self.statements(queries)), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(self.stats(self.author), (1, 0))
+        self.assertEqual(self.stats(self.reader), (0, 1))
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=self.post),
+        )
+        self.assertTrue(follow_graph.unfollow(self.reader, self.author))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertFalse(follow_graph.unfollow(self.reader, self.author))
+        self.assertEqual(len(self.statements(queries)), 1)
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.stats(self.author), (0, 0))
+        self.assertEqual(self.stats(self.reader), (0, 0))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+
+    def test_cannot_follow_self(self):
+        """Подписка на себя не создаётся."""
+        self.assertFalse(follow_graph.follow(self.author, self.author))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_followed_ids_in_one_query(self):
+        """Проверка подписок на список авторов — один запрос."""
+        authors = mixer.cycle(50).blend(User)
+        for author in authors[::2]:
+            follow_graph.follow(self.reader, author)
+        with self.assertNumQueries(1):
+            followed = follow_graph.followed_ids(
+                self.reader,
+                (author.pk for author in authors),
+            )
+        self.assertEqual(followed, {author.pk for author in authors[::2]})
+
+    def test_post_returns_short_response(self):
+        """POST на подписку и отписку отвечает JSON без перехода."""
+        for name, following in (
+            ('posts:profile_follow', True),
+            ('posts:profile_unfollow', False),
+        ):
+            with self.subTest(name=name):
+                response = self.client.post(
+                    reverse(name, args=(self.author.username,)),
+                )
+                self.assertEqual(
+                    response.json(),
+                    {'following': following, 'changed': True},
+                )
+                self.assertFalse(response.templates)
+
+    def test_unfollow_without_follow_redirects(self):
+        """Отписка без подписки больше не отвечает 404."""
+        response = self.client.get(
+            reverse('posts:profile_unfollow', args=(self.author.username,)),
+        )
+        self.assertRedirects(response, reverse('posts:follow_index'))
+
+    def test_follow_lists_are_paginated(self):
+        """Списки подписчиков и подписок выводятся постранично."""
+        followers = mixer.cycle(settings.OBJECTS_PER_PAGE + 3).blend(User)
+        for user in followers:
+            follow_graph.follow(user, self.author)
+        follow_graph.follow(self.reader, followers[0])
+        url = reverse('posts:followers', args=(self.author.username,))
+        first_page = self.client.get(url).context
+        second_page = self.client.get(url + '?page=2').context
+        self.assertEqual(
+            [user.pk for user in first_page['page_obj']],
+            [user.pk for user in followers[::-1][: settings.OBJECTS_PER_PAGE]],
+        )
+        self.assertEqual(len(second_page['page_obj']), 3)
+        self.assertEqual(second_page['followed'], {followers[0].pk})
+        following = self.client.get(
+            reverse('posts:following', args=(followers[0].username,)),
+        ).context['page_obj']
+        self.assertEqual(list(following), [self.author])
+
+    def test_api_following_ids(self):
+        """API отвечает, на кого из списка авторов подписан читатель."""
+        other = mixer.blend(User)
+        follow_graph.follow(self.reader, self.author)
+        response = self.client.get(
+            reverse('posts:api_following_ids'),
+            {'ids': f'{other.pk},{self.author.pk}'},
+        )
+        self.assertEqual(response.json(), {'following': [self.author.pk]})
+
+    def test_page_buttons_post_with_csrf_token(self):
+        """Кнопки страниц подписываются POST-запросом с токеном CSRF."""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.reader)
+        follow_graph.follow(self.author, self.reader)
+        follow_url = reverse('posts:profile_follow', args=(self.author,))
+        for url in (
+            reverse('posts:profile', args=(self.author,)),
+            reverse('posts:followers', args=(self.reader,)),
+        ):
+            with self.subTest(url=url):
+                content = client.get(url).content.decode()
+                self.assertIn('js-follow', content)
+                self.assertIn(f'href="{follow_url}"', content)
+                token = re.search(r"'X-CSRFToken': '(\w+)'", content)[1]
+                response = client.post(follow_url, HTTP_X_CSRFTOKEN=token)
+                self.assertEqual(response.json()['following'], True)
+                follow_graph.unfollow(self.reader, self.author)
@@ -1,15 +1,17 @@
 from http import HTTPStatus
+from io import StringIO
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.auth.views import redirect_to_login
+from django.core.management import call_command
 from django.test import Client, TestCase
 from django.urls import reverse
 from faker import Faker
 from mixer.backend.django import mixer
 from requests import request
 
-from posts.models import Comment, Follow, Post
+from posts.models import Comment, Follow, Post, UserStats
 from posts.tests.common import image
 
 User = get_user_model()
@@ -276,3 +278,59 @@ class FollowingTest(TestCase):
                 text=data['text'],
             ).exists()
         )
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user, cls.author = mixer.cycle(2).blend(User)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются вместе с постами, комментариями и подписками."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': faker.text()},
+        )
+        post = Post.objects.get(author=self.user)
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'pk': post.pk}),
+            data={'text': faker.text()},
+        )
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': self.author}),
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(UserStats.objects.get(user=self.user).posts_count, 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.user).following_count,
+            1,
+        )
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).followers_count,
+            1,
+        )
+        self.authorized_client.get(
+            reverse(
+                'posts:profile_unfollow',
+                kwargs={'username': self.author},
+            ),
+        )
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).followers_count,
+            0,
+        )
+
+    def test_rebuild_counters_command(self):
+        """Команда rebuild_counters исправляет разошедшиеся счётчики."""
+        post = mixer.blend('posts.Post', author=self.author)
+        mixer.cycle(2).blend('posts.Comment', post=post)
+        Follow.objects.create(user=self.user, author=self.author)
+        call_command('rebuild_counters', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 2)
+        self.assertEqual(self.author.stats.posts_count, 1)
+        self.assertEqual(self.author.stats.followers_count, 1)
+        self.assertEqual(self.user.stats.following_count, 1)
@@ -0,0 +1,166 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from mixer.backend.django import mixer
+from PIL import Image
+
+from posts import images, thumbnails
+from posts.models import Post
+from posts.tests.common import image
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+# Значение EXIF Orientation «повернуть на 90° по часовой стрелке».
+ROTATE_90 = 6
+
+
+def photo(size: tuple[int, int] = (64, 32)) -> SimpleUploadedFile:
+    exif = Image.Exif()
+    exif[0x0112] = ROTATE_90
+    file = BytesIO()
+    Image.new('RGB', size, (0, 155, 0)).save(file, 'JPEG', exif=exif)
+    return SimpleUploadedFile('photo.jpg', file.getvalue(), 'image/jpeg')
+
+
+def stored_files() -> list[str]:
+    return sorted(
+        str(path.relative_to(TEMP_MEDIA_ROOT))
+        for path in Path(TEMP_MEDIA_ROOT).rglob('*')
+        if path.is_file()
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_MAX_SIZE=16)
+class ImageProcessingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = mixer.blend(User)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_process_normalizes_and_swaps_image(self):
+        """Картинка повёрнута, уменьшена, без EXIF и заменена в посте."""
+        post = Post.objects.create(author=self.author, image=photo())
+        original = post.image.name
+        images.process(original)
+        post.refresh_from_db()
+        self.assertTrue(post.image.name.endswith('.webp'))
+        images.storage.sweep(0)
+        self.assertFalse(images.storage.exists(original))
+        with images.storage.open(post.image.name) as file:
+            with Image.open(file) as result:
+                self.assertEqual(result.format, 'WEBP')
+                self.assertEqual(result.size, (8, 16))
+                self.assertNotIn('exif', result.info)
+        self.assertEqual(
+            (post.image_width, post.image_height, post.image_format),
+            (8, 16, 'WEBP'),
+        )
+
+    def test_processed_image_is_kept(self):
+        """Повторная обработка не создаёт новый файл."""
+        post = Post.objects.create(author=self.author, image=image())
+        images.process(post.image.name)
+        post.refresh_from_db()
+        processed = post.image.name
+        self.assertEqual(images.optimize(processed), processed)
+
+    def test_edited_post_keeps_new_image(self):
+        """Если картинку поста уже сменили, результат выбрасывается."""
+        post = Post.objects.create(author=self.author, image=photo())
+        original = post.image.name
+        Post.objects.filter(pk=post.pk).update(image='posts/other.gif')
+        files = stored_files()
+        with mock.patch.object(thumbnails, 'generate') as generate:
+            images.process(original)
+        generate.assert_not_called()
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, 'posts/other.gif')
+        self.assertEqual(stored_files(), files)
+
+    def test_upload_is_processed_in_background(self):
+        """Создание поста только ставит обработку картинки в очередь."""
+        self.client.force_login(self.author)
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            self.client.post(
+                reverse('posts:post_create'),
+                {'text': 'фото', 'image': photo()},
+            )
+        post = Post.objects.get()
+        schedule.assert_called_once_with(post.image.name, images.process)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageMetadataTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = mixer.blend(User)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_metadata_recorded_on_upload(self):
+        """Размеры и формат записываются при загрузке и правке."""
+        post = Post.objects.create(author=self.author, image=photo())
+        self.assertEqual(
+            (post.image_width, post.image_height, post.image_format),
+            (64, 32, 'JPEG'),
+        )
+        self.client.force_login(self.author)
+        self.client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            {'text': 'правка', 'image': image()},
+        )
+        post.refresh_from_db()
+        self.assertEqual(
+            (post.image_width, post.image_height, post.image_format),
+            (30, 30, 'GIF'),
+        )
+        post.image = None
+        post.save()
+        post.refresh_from_db()
+        self.assertIsNone(post.image_width)
+        self.assertEqual(post.image_format, '')
+
+    def test_backfill_command(self):
+        """Команда заполняет метаданные старых постов в пуле процессов."""
+        posts = [
+            Post.objects.create(author=self.author, image=photo())
+            for _ in range(3)
+        ]
+        Post.objects.update(image_width=None, image_height=None)
+        Post.objects.filter(pk=posts[0].pk).update(image='posts/missing.jpg')
+        err = StringIO()
+        call_command(
+            'backfill_image_metadata',
+            workers=2,
+            batch_size=2,
+            stdout=StringIO(),
+            stderr=err,
+        )
+        self.assertEqual(
+            list(
+                Post.objects.order_by('pk').values_list(
+                    'image_width',
+                    'image_height',
+                ),
+            ),
+            [(None, None), (64, 32), (64, 32)],
+        )
+        self.assertIn('Не удалось прочитать картинок: 1', err.getvalue())
@@ -0,0 +1,124 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts import search
+from posts.models import Comment, Follow, Post, TimelineEntry, UserStats
+
+User = get_user_model()
+
+RECORDS = [
+    {'type': 'user', 'username': 'leo'},
+    {'type': 'user', 'username': 'fyodor'},
+    {'type': 'group', 'slug': 'novels', 'title': 'Романы'},
+    {
+        'type': 'post',
+        'id': 100,
+        'author': 'leo',
+        'group': 'novels',
+        'text': 'Все счастливые семьи похожи',
+        'pub_date': '1877-01-01T10:00:00',
+    },
+    {
+        'type': 'comment',
+        'id': 7,
+        'post': 100,
+        'author': 'fyodor',
+        'text': 'Согласен',
+        'created': '1877-02-01T10:00:00',
+    },
+    {'type': 'follow', 'user': 'fyodor', 'author': 'leo'},
+    {'type': 'post', 'id': 101, 'author': 'nobody', 'text': 'Без автора'},
+]
+
+
+class ImportYatubeTest(TestCase):
+    def setUp(self) -> None:
+        self.directory = Path(tempfile.mkdtemp())
+        self.path = self.directory / 'dump.jsonl'
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, records: list) -> None:
+        self.path.write_text(
+            '\n'.join(json.dumps(record) for record in records),
+        )
+
+    def import_dump(self) -> str:
+        out = StringIO()
+        call_command('import_yatube', str(self.path), batch_size=2, stdout=out)
+        return out.getvalue()
+
+    def test_import_keeps_ids_dates_and_rebuilds_derived_data(self):
+        """Импорт сохраняет id и даты и пересчитывает производные данные."""
+        self.write(RECORDS)
+        output = self.import_dump()
+        post = Post.objects.get()
+        self.assertEqual(post.pk, 100)
+        self.assertEqual(post.pub_date.year, 1877)
+        self.assertEqual(Comment.objects.get().created.month, 2)
+        self.assertTrue(Follow.objects.filter(user__username='fyodor'))
+        self.assertEqual(
+            UserStats.objects.get(user__username='leo').followers_count,
+            1,
+        )
+        self.assertEqual(TimelineEntry.objects.get().post, post)
+        self.assertEqual(
+            list(search.search(Post.objects.all(), 'семьи')),
+            [post],
+        )
+        self.assertIn('пропущено: 1', output)
+        self.assertFalse(Path(f'{self.path}.checkpoint').exists())
+        new_post = Post.objects.create(author=post.author, text='новый')
+        self.assertGreater(new_post.pk, post.pk)
+
+    def test_import_resumes_after_failure(self):
+        """После сбоя импорт продолжается с последней порции."""
+        broken = [*RECORDS[:4], {'type': 'unknown'}, *RECORDS[4:]]
+        self.write(broken)
+        with self.assertRaises(CommandError):
+            self.import_dump()
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertFalse(Comment.objects.exists())
+        live = Post.objects.create(author=User.objects.first(), text='живой')
+        self.assertEqual(
+            list(search.search(Post.objects.all(), 'живой')),
+            [live],
+        )
+        live.delete()
+        broken[4] = {'type': 'user', 'username': 'anna'}
+        self.write(broken)
+        output = self.import_dump()
+        self.assertIn('Продолжение со строки 5', output)
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(User.objects.count(), 3)
+
+    def test_taken_post_id_is_skipped(self):
+        """Пост с чужим id не вставляется и не получает комментарии."""
+        author = User.objects.create(username='tolstoy')
+        live = Post.objects.create(pk=100, author=author, text='живой')
+        self.write(RECORDS)
+        output = self.import_dump()
+        live.refresh_from_db()
+        self.assertEqual(live.text, 'живой')
+        self.assertNotEqual(live.pub_date.year, 1877)
+        self.assertFalse(live.comments.exists())
+        self.assertIn('пропущено: 3', output)
+
+    def test_repeated_import_changes_nothing(self):
+        """Повторный импорт того же файла ничего не переписывает."""
+        self.write(RECORDS)
+        self.import_dump()
+        Post.objects.filter(pk=100).update(text='Правка')
+        output = self.import_dump()
+        self.assertEqual(Post.objects.get().text, 'Правка')
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertIn('пропущено: 3', output)
@@ -0,0 +1,90 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from posts import images
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+NUMBER_TEST_POSTS = 15
+
+INDEXED_TABLES = (
+    'posts_post',
+    'posts_comment',
+    'posts_follow',
+    'posts_timelineentry',
+)
+
+FULL_SCAN = re.compile(
+    r'SCAN (?:TABLE )?(?P<table>\w+)(?: AS \w+)?$',
+)
+
+
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author, cls.follower = mixer.cycle(2).blend(User)
+        cls.group = mixer.blend('posts.Group')
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        cls.posts = mixer.cycle(NUMBER_TEST_POSTS).blend(
+            'posts.Post',
+            author=cls.author,
+            group=cls.group,
+        )
+        mixer.cycle(NUMBER_TEST_POSTS).blend(
+            'posts.Comment',
+            post=cls.posts[0],
+            author=cls.follower,
+        )
+        cls.urls = (
+            reverse('posts:h_page'),
+            reverse('posts:h_page') + '?page=2',
+            reverse('posts:h_page') + '?cursor=',
+            reverse('posts:page_post', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.author}),
+            reverse('posts:follow_index') + '?cursor=',
+            reverse('posts:post_detail', kwargs={'pk': cls.posts[0].pk}),
+            reverse('posts:follow_index'),
+        )
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.follower)
+
+    def query_plan(self, sql: str) -> list[str]:
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы страниц не сканируют таблицы целиком и не сортируют."""
+        for url in self.urls:
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.authorized_client.get(url)
+            for query in queries.captured_queries:
+                if not any(table in query['sql'] for table in INDEXED_TABLES):
+                    continue
+                for step in self.query_plan(query['sql']):
+                    with self.subTest(url=url, sql=query['sql'], step=step):
+                        scan = FULL_SCAN.search(step)
+                        self.assertFalse(
+                            scan and scan['table'] in INDEXED_TABLES,
+                        )
+                        self.assertNotIn('TEMP B-TREE', step)
+
+    def test_image_lookups_use_index(self):
+        """Подсчёт ссылок на картинку и замена картинки идут по индексу."""
+        name = 'posts/ab/cd/abcd.webp'
+        with CaptureQueriesContext(connection) as queries:
+            images.storage.references(name)
+            Post.objects.filter(image=name).update(image='')
+        for query in queries.captured_queries:
+            for step in self.query_plan(query['sql']):
+                with self.subTest(sql=query['sql'], step=step):
+                    self.assertIsNone(FULL_SCAN.search(step))
@@ -1,8 +1,11 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 from mixer.backend.django import mixer
 
+from posts.models import Follow
+
 User = get_user_model()
 
 
@@ -56,3 +59,13 @@ class FollowModelTest(TestCase):
             self.subscription.__str__(),
             self.subscription.user.get_username()[: settings.SHOW_CHARACTERS],
         )
+
+    def test_follow_constraints(self):
+        """Повторная подписка и подписка на себя запрещены на уровне БД."""
+        for user, author in (
+            (self.subscription.user, self.subscription.author),
+            (self.subscription.user, self.subscription.user),
+        ):
+            with self.subTest(user=user, author=author):
+                with self.assertRaises(IntegrityError), transaction.atomic():
+                    Follow.objects.create(user=user, author=author)
@@ -1,9 +1,16 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from mixer.backend.django import mixer
 
+from posts import feed_counts
+from posts.models import Follow, Post
+from yatube.utils import NEXT, KeysetPaginator, encode_cursor
+
 User = get_user_model()
 
 
@@ -53,3 +60,188 @@ class PaginatorViewsTest(TestCase):
                     ),
                     NUMBER_TEST_POSTS - settings.OBJECTS_PER_PAGE,
                 )
+
+
+class KeysetPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = mixer.blend(User)
+        cls.posts = mixer.cycle(NUMBER_TEST_POSTS).blend(
+            'posts.Post',
+            author=cls.author,
+        )
+        cls.url = reverse('posts:profile', kwargs={'username': cls.author})
+
+    def test_pages_follow_cursors_without_overlap(self):
+        """Курсоры ведут по всем постам без пропусков и повторов."""
+        first_page = self.client.get(self.url + '?cursor=').context['page_obj']
+        self.assertEqual(len(first_page), settings.OBJECTS_PER_PAGE)
+        self.assertFalse(first_page.has_previous())
+        self.assertTrue(first_page.has_next())
+        second_page = self.client.get(
+            self.url + '?cursor=' + first_page.next_cursor,
+        ).context['page_obj']
+        self.assertEqual(
+            len(second_page),
+            NUMBER_TEST_POSTS - settings.OBJECTS_PER_PAGE,
+        )
+        self.assertFalse(second_page.has_next())
+        self.assertEqual(
+            {post.pk for post in [*first_page, *second_page]},
+            {post.pk for post in self.posts},
+        )
+        back_page = self.client.get(
+            self.url + '?cursor=' + second_page.previous_cursor,
+        ).context['page_obj']
+        self.assertEqual(list(back_page), list(first_page))
+
+    def test_keyset_page_does_not_count(self):
+        """Страница по курсору не выполняет COUNT и OFFSET."""
+        with self.assertNumQueries(1) as queries:
+            KeysetPaginator(Post.objects.all(), 5).page(None)
+        self.assertNotIn('COUNT', queries.captured_queries[0]['sql'])
+        self.assertNotIn('OFFSET', queries.captured_queries[0]['sql'])
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Некорректный курсор приводит на первую страницу."""
+        cursors = (
+            'broken',
+            encode_cursor(NEXT, '2020-13-45T00:00:00', 1),
+            encode_cursor(NEXT, True, 1),
+            encode_cursor(NEXT, 1, False),
+            encode_cursor(NEXT, 1, 1),
+            encode_cursor(NEXT, 1.5, 1),
+        )
+        for url in (self.url, reverse('posts:h_page')):
+            for cursor in cursors:
+                with self.subTest(url=url, cursor=cursor):
+                    page = self.client.get(url, {'cursor': cursor}).context[
+                        'page_obj'
+                    ]
+                    self.assertEqual(len(page), settings.OBJECTS_PER_PAGE)
+                    self.assertIsNone(page.cursor)
+
+    def test_cursor_of_other_type_returns_first_page(self):
+        """Курсор с чужим типом ключа не роняет API и поиск."""
+        first = self.client.get(reverse('posts:api_index')).json()
+        for value in (1, 1.5, 'дата'):
+            with self.subTest(value=value):
+                response = self.client.get(
+                    reverse('posts:api_index'),
+                    {'cursor': encode_cursor(NEXT, value, 1)},
+                )
+                self.assertEqual(response.json(), first)
+        response = self.client.get(
+            reverse('posts:search'),
+            {
+                'q': 'курсор',
+                'cursor': encode_cursor(
+                    NEXT,
+                    self.posts[0].pub_date,
+                    self.posts[0].pk,
+                ),
+            },
+        )
+        self.assertIsNone(response.context['page_obj'].cursor)
+
+
+class FeedCountsTest(TransactionTestCase):
+    """Итоги лент меняются после фиксации записи, без пересчёта."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.author = mixer.blend(User)
+        self.reader = mixer.blend(User)
+        self.group = mixer.blend('posts.Group')
+        self.other_group = mixer.blend('posts.Group')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.posts = [
+            Post.objects.create(author=self.author, group=self.group)
+            for _ in range(NUMBER_TEST_POSTS)
+        ]
+        self.client.force_login(self.reader)
+
+    def counts(self) -> dict:
+        return {
+            'index': feed_counts.count('index'),
+            'group': feed_counts.count('group', self.group.pk),
+            'other_group': feed_counts.count('group', self.other_group.pk),
+            'follow': feed_counts.count('follow', self.reader.pk),
+            'profile': User.objects.get(pk=self.author.pk).stats.posts_count,
+        }
+
+    def test_pages_do_not_count_rows(self):
+        """Повторный вывод страницы по номеру обходится без COUNT."""
+        urls = (
+            reverse('posts:h_page'),
+            reverse('posts:page_post', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.client.get(url + '?page=2')
+                with CaptureQueriesContext(connection) as queries:
+                    page = self.client.get(url + '?page=2').context['page_obj']
+                self.assertEqual(
+                    len(page),
+                    NUMBER_TEST_POSTS - settings.OBJECTS_PER_PAGE,
+                )
+                self.assertFalse(
+                    [
+                        query['sql']
+                        for query in queries.captured_queries
+                        if 'COUNT(' in query['sql']
+                    ],
+                )
+
+    def test_writes_update_counts(self):
+        """Создание, перенос и удаление поста меняют итоги лент."""
+        self.assertEqual(
+            self.counts(),
+            {
+                'index': NUMBER_TEST_POSTS,
+                'group': NUMBER_TEST_POSTS,
+                'other_group': 0,
+                'follow': NUMBER_TEST_POSTS,
+                'profile': NUMBER_TEST_POSTS,
+            },
+        )
+        post = Post.objects.create(author=self.author, group=self.group)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                feed_counts.count('index'),
+                NUMBER_TEST_POSTS + 1,
+            )
+            self.assertEqual(
+                feed_counts.count('group', self.group.pk),
+                NUMBER_TEST_POSTS + 1,
+            )
+        self.assertEqual(
+            feed_counts.count('follow', self.reader.pk),
+            NUMBER_TEST_POSTS + 1,
+        )
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(
+            self.counts(),
+            {
+                'index': NUMBER_TEST_POSTS + 1,
+                'group': NUMBER_TEST_POSTS,
+                'other_group': 1,
+                'follow': NUMBER_TEST_POSTS + 1,
+                'profile': NUMBER_TEST_POSTS + 1,
+            },
+        )
+        post.delete()
+        self.posts[0].delete()
+        self.assertEqual(
+            self.counts(),
+            {
+                'index': NUMBER_TEST_POSTS - 1,
+                'group': NUMBER_TEST_POSTS - 1,
+                'other_group': 0,
+                'follow': NUMBER_TEST_POSTS - 1,
+                'profile': NUMBER_TEST_POSTS - 1,
+            },
+        )
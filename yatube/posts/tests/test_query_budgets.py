@@ -0,0 +1,145 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.urls import URLPattern, reverse
+from mixer.backend.django import mixer
+
+from posts import counters, query_budgets, timeline, urls
+from posts.apps import PostsConfig
+from posts.models import Comment, Follow, Post
+
+User = get_user_model()
+
+SMALL = 2
+
+LARGE = 12
+
+GET_PARAMS = {
+    'posts:search': {'q': 'бюджет'},
+    'posts:api_posts_by_ids': {'ids': ','.join(map(str, range(1, 20)))},
+    'posts:api_following_ids': {'ids': ','.join(map(str, range(1, 50)))},
+}
+
+# Адреса только для персонала: замер под читателем измерил бы редирект.
+STAFF_ONLY = {'posts:export'}
+
+
+@override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+class QueryBudgetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.reader = mixer.blend(User)
+        cls.staff = mixer.blend(User, is_staff=True)
+        cls.group = mixer.blend('posts.Group')
+        cls.authors = mixer.cycle(LARGE).blend(User)
+        cls.author = cls.authors[0]
+        cls.post = Post.objects.create(
+            author=cls.reader,
+            group=cls.group,
+            text='бюджет запросов',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self) -> None:
+        self.client.force_login(self.reader)
+
+    def seed(self, rows: int) -> None:
+        """По rows постов, комментариев и подписок на каждую ленту."""
+        authors = self.authors[:rows]
+        for author in authors:
+            Follow.objects.get_or_create(user=self.reader, author=author)
+            Follow.objects.get_or_create(user=author, author=self.reader)
+        while self.reader.posts.count() < rows + 1:
+            Post.objects.create(
+                author=self.reader,
+                group=self.group,
+                text='бюджет запросов',
+            )
+        while self.author.posts.count() < rows:
+            Post.objects.create(author=self.author, group=self.group)
+        for author in authors[self.post.comments.count():]:  # fmt: skip
+            Comment.objects.create(post=self.post, author=author, text='-')
+        timeline.rebuild()
+        counters.rebuild()
+
+    def url(self, name: str) -> str:
+        kwargs = {
+            'kind': 'posts',
+            'pk': self.post.pk,
+            'slug': self.group.slug,
+            'username': self.author.username,
+        }
+        pattern = next(
+            pattern
+            for pattern in urls.urlpatterns
+            if f'{PostsConfig.name}:{pattern.name}' == name
+        )
+        return reverse(
+            name,
+            kwargs={key: kwargs[key] for key in pattern.pattern.converters},
+        )
+
+    def record(self, name: str) -> query_budgets.QueryRecorder:
+        recorder = query_budgets.QueryRecorder()
+        cache.clear()
+        self.client.force_login(
+            self.staff if name in STAFF_ONLY else self.reader,
+        )
+        # Подписки и отписки не должны влиять на следующий замер.
+        with transaction.atomic():
+            with connection.execute_wrapper(recorder):
+                response = self.client.get(
+                    self.url(name),
+                    GET_PARAMS.get(name),
+                )
+                # Потоковые ответы выполняют запросы при чтении тела.
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            transaction.set_rollback(True)
+        self.assertLess(response.status_code, 400, name)
+        if name in STAFF_ONLY:
+            self.assertEqual(response.status_code, 200, name)
+        return recorder
+
+    def record_all(self, rows: int) -> dict:
+        self.seed(rows)
+        return {name: self.record(name) for name in query_budgets.BUDGETS}
+
+    def test_every_view_has_budget(self):
+        """Для каждого адреса posts: задан бюджет запросов."""
+        self.assertEqual(
+            {
+                f'{PostsConfig.name}:{pattern.name}'
+                for pattern in urls.urlpatterns
+                if isinstance(pattern, URLPattern)
+            },
+            set(query_budgets.BUDGETS),
+        )
+
+    def test_query_count_within_budget_and_constant(self):
+        """Число запросов в бюджете и не растёт с числом записей."""
+        small = self.record_all(SMALL)
+        large = self.record_all(LARGE)
+        for name, budget in query_budgets.BUDGETS.items():
+            with self.subTest(view=name):
+                self.assertEqual(
+                    len(small[name]),
+                    len(large[name]),
+                    self.report(
+                        query_budgets.growth(small[name], large[name]),
+                    ),
+                )
+                self.assertLessEqual(
+                    len(large[name]),
+                    budget,
+                    self.report(large[name].queries),
+                )
+
+    @staticmethod
+    def report(queries: list[dict]) -> str:
+        return '\n'.join(
+            f"{query.get('extra', 1)} x {query['sql']}\n"
+            f"    шаблон: {query['template']}, код: {query['code']}"
+            for query in queries
+        )
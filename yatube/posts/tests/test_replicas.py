@@ -0,0 +1,74 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from posts import conditional, feed_counts
+from posts.models import Post
+
+User = get_user_model()
+
+REPLICA = 'lagging_replica'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class LaggingReplicaTest(TransactionTestCase):
+    """Кэш заполняется по основной базе, даже если GET ушёл на реплику."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.author = mixer.blend(User)
+        self.group = mixer.blend('posts.Group')
+        Post.objects.create(author=self.author, group=self.group, text='до')
+        self.directory = tempfile.TemporaryDirectory()
+        path = str(Path(self.directory.name) / 'replica.sqlite3')
+        connections.databases[REPLICA] = {
+            **connection.settings_dict,
+            'NAME': path,
+        }
+        # Снимок основной базы до записи: реплика отстаёт на один пост.
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        connection.connection.backup(target)
+        target.close()
+        self.new_post = Post.objects.create(
+            author=self.author,
+            group=self.group,
+            text='после снимка',
+        )
+        cache.clear()
+
+    def tearDown(self) -> None:
+        connections[REPLICA].close()
+        del connections.databases[REPLICA]
+        delattr(connections._connections, REPLICA)
+        self.directory.cleanup()
+
+    def test_replica_is_lagging(self):
+        """Реплика в тесте действительно не видит новый пост."""
+        self.assertEqual(Post.objects.using(REPLICA).count(), 1)
+
+    def test_feeds_fill_cache_from_primary(self):
+        """Фрагменты, валидаторы и итоги лент не берутся с реплики."""
+        urls = (
+            reverse('posts:h_page'),
+            reverse('posts:page_post', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'после снимка')
+        self.assertEqual(feed_counts.count('index'), 2)
+        self.assertEqual(feed_counts.count('group', self.group.pk), 2)
+        self.assertEqual(feed_counts.count('author', self.author.pk), 2)
+        self.assertEqual(conditional.validator('index')[1], 2)
+        self.assertEqual(
+            conditional.validator('group', self.group.slug)[1],
+            2,
+        )
@@ -0,0 +1,102 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from posts import search
+from posts.models import Post
+
+User = get_user_model()
+
+
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = mixer.blend(User)
+        cls.group = mixer.blend('posts.Group')
+        cls.best = Post.objects.create(
+            author=cls.author,
+            text='котики котики котики',
+        )
+        cls.other = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='про котики и собак, а ещё немного про погоду и море',
+        )
+        Post.objects.create(author=cls.author, text='ничего общего')
+        cls.url = reverse('posts:search')
+
+    def found(self, text: str, **filters) -> list:
+        response = self.client.get(self.url, {'q': text, **filters})
+        return list(response.context['page_obj'])
+
+    def test_search_ranks_matches(self):
+        """Найдены только подходящие посты, более релевантный выше."""
+        self.assertEqual(self.found('котики'), [self.best, self.other])
+
+    def test_search_filters(self):
+        """Выдачу можно ограничить группой и автором."""
+        self.assertEqual(
+            self.found('котики', group=self.group.slug),
+            [self.other],
+        )
+        self.assertEqual(self.found('котики', author='nobody'), [])
+
+    def test_search_ignores_query_syntax(self):
+        """Операторы FTS5 и спецсимволы во вводе не ломают поиск."""
+        for text in ('"', 'котики AND', 'NEAR(', '*', '-котики', ''):
+            with self.subTest(text=text):
+                self.assertEqual(
+                    self.client.get(self.url, {'q': text}).status_code, 200
+                )
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при правке и удалении поста."""
+        Post.objects.filter(pk=self.best.pk).update(text='собаки')
+        self.assertEqual(self.found('котики'), [self.other])
+        self.assertIn(self.best, self.found('собаки'))
+        Post.objects.filter(pk=self.other.pk).delete()
+        self.assertEqual(self.found('котики'), [])
+
+    def test_search_pages_by_cursor(self):
+        """Курсор следующей страницы сохраняет поисковый запрос."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'котики {number}')
+            for number in range(15)
+        )
+        response = self.client.get(self.url, {'q': 'котики'})
+        page = response.context['page_obj']
+        self.assertContains(response, 'q=%D0%BA')
+        second = self.client.get(
+            self.url,
+            {'q': 'котики', 'cursor': page.next_cursor},
+        ).context['page_obj']
+        self.assertEqual(len(page) + len(second), 17)
+        self.assertFalse({*page} & {*second})
+
+
+class RebuildSearchIndexTest(TestCase):
+    def test_rebuild_restores_index(self):
+        """Команда заново заполняет индекс порциями."""
+        author = mixer.blend(User)
+        Post.objects.bulk_create(
+            Post(author=author, text=f'слово {number}') for number in range(5)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {search.TABLE}({search.TABLE}) "
+                "VALUES ('delete-all')",
+            )
+        queryset = Post.objects.all()
+        self.assertFalse(search.search(queryset, 'слово').exists())
+        out = StringIO()
+        call_command('rebuild_search_index', batch_size=2, stdout=out)
+        self.assertIn('Проиндексировано постов: 4', out.getvalue())
+        self.assertEqual(
+            set(search.search(queryset, 'слово')),
+            set(queryset),
+        )
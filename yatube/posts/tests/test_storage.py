@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from mixer.backend.django import mixer
+
+from posts import images
+from posts.models import Post
+from posts.tests.common import image
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = mixer.blend(User)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_same_content_is_stored_once(self):
+        """Одинаковые загрузки хранятся одним файлом в подкаталогах."""
+        first = Post.objects.create(author=self.author, image=image('a.gif'))
+        directory = first.image.name.rsplit('/', 1)[0]
+        files = images.storage.listdir(directory)[1]
+        second = Post.objects.create(author=self.author, image=image('b.GIF'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(images.storage.listdir(directory)[1], files)
+        self.assertTrue(images.storage.is_content_name(first.image.name))
+        self.assertTrue(first.image.name.endswith('.gif'))
+
+    def test_file_is_deleted_with_last_reference(self):
+        """Файл удаляется, только когда на него не ссылается ни один пост."""
+        first = Post.objects.create(author=self.author, image=image())
+        second = Post.objects.create(author=self.author, image=image())
+        name = first.image.name
+        Post.objects.filter(pk=first.pk).delete()
+        images.storage.delete(name)
+        call_command('sweep_images', grace=0, stdout=StringIO())
+        self.assertTrue(images.storage.exists(name))
+        Post.objects.filter(pk=second.pk).delete()
+        images.storage.delete(name)
+        self.assertTrue(images.storage.exists(name))
+        call_command('sweep_images', grace=0, stdout=StringIO())
+        self.assertFalse(images.storage.exists(name))
+
+    def test_reused_file_survives_sweep(self):
+        """Переиспользованный файл без ссылок не удаляется до конца срока."""
+        name = images.storage.save('posts/a.gif', image())
+        path = images.storage.path(name)
+        os.utime(path, (0, 0))
+        self.assertEqual(images.storage.save('posts/b.gif', image()), name)
+        call_command('sweep_images', grace=60, stdout=StringIO())
+        self.assertTrue(images.storage.exists(name))
+        os.utime(path, (0, 0))
+        call_command('sweep_images', grace=60, stdout=StringIO())
+        self.assertFalse(images.storage.exists(name))
+
+    def test_move_command_renames_legacy_files(self):
+        """Команда переносит старые файлы и объединяет одинаковые."""
+        legacy = FileSystemStorage()
+        names = [legacy.save(f'posts/{name}', image()) for name in 'ab']
+        for name in names:
+            Post.objects.create(author=self.author, image=name)
+        call_command('move_images_to_content_storage', stdout=StringIO())
+        moved = set(Post.objects.values_list('image', flat=True))
+        self.assertEqual(len(moved), 1)
+        self.assertTrue(images.storage.exists(moved.pop()))
+        for name in names:
+            self.assertFalse(legacy.exists(name))
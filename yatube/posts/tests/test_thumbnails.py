@@ -0,0 +1,140 @@
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from mixer.backend.django import mixer
+from sorl.thumbnail import default
+
+from posts import thumbnails
+from posts.models import Post
+from posts.tests.common import image
+
+User = get_user_model()
+
+
+class ThumbnailTestCase(TestCase):
+    """Своя MEDIA_ROOT и пустое хранилище sorl у каждого класса."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        # Записи прошлых классов в кэше выдают несозданные миниатюры
+        # за готовые уже в setUpTestData.
+        cache.clear()
+        default.kvstore.clear()
+        try:
+            super().setUpClass()
+        except Exception:
+            cls._remove_media()
+            raise
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        cls._remove_media()
+
+    @classmethod
+    def _remove_media(cls) -> None:
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+
+class PregeneratedThumbnailTest(ThumbnailTestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.post = mixer.blend(
+            'posts.Post',
+            author=mixer.blend(User),
+            image=image(),
+        )
+        cls.url = reverse('posts:post_detail', kwargs={'pk': cls.post.pk})
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_missing_thumbnail_is_scheduled_not_rendered(self):
+        """Отсутствующая миниатюра ставится в очередь, а не создаётся."""
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            response = self.client.get(self.url)
+        schedule.assert_called_once_with(self.post.image.name)
+        self.assertContains(response, 'Картинка обрабатывается')
+        self.assertNotContains(response, settings.MEDIA_URL + 'cache/')
+
+    def test_pregenerated_thumbnail_is_rendered(self):
+        """Готовая миниатюра выводится без повторного создания."""
+        thumbnails.generate(self.post.image.name)
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            response = self.client.get(self.url)
+        schedule.assert_not_called()
+        self.assertContains(response, settings.MEDIA_URL + 'cache/')
+
+
+class FeedThumbnailPrefetchTest(ThumbnailTestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.posts = [
+            mixer.blend('posts.Post', image=image(f'feed{number}.gif'))
+            for number in range(settings.OBJECTS_PER_PAGE)
+        ]
+        for post in cls.posts:
+            thumbnails.generate(post.image.name)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_page_thumbnails_are_fetched_in_one_query(self):
+        """Миниатюры страницы берутся одним запросом к хранилищу."""
+        posts = list(Post.objects.all())
+        with self.assertNumQueries(1):
+            thumbnails.prefetch(posts)
+        with self.assertNumQueries(0):
+            thumbnails.prefetch(posts)
+        for post in posts:
+            with self.subTest(post=post):
+                self.assertIsNotNone(post.thumbnail)
+
+    def test_feed_renders_prefetched_thumbnails(self):
+        """Лента выводит готовые миниатюры без очереди на создание."""
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            response = self.client.get(reverse('posts:h_page'))
+        schedule.assert_not_called()
+        self.assertContains(
+            response,
+            settings.MEDIA_URL + 'cache/',
+            count=settings.OBJECTS_PER_PAGE,
+        )
+
+
+class ScheduleTest(TestCase):
+    def job(self, name: str) -> None:
+        self.calls.append((name, threading.current_thread().name))
+
+    def setUp(self) -> None:
+        self.calls = []
+
+    @override_settings(THUMBNAIL_WORKERS=0)
+    def test_no_workers_runs_job_inline(self):
+        """Без пула картинка обрабатывается сразу, в том же потоке."""
+        thumbnails._submit('inline.gif', self.job)
+        self.assertEqual(
+            self.calls,
+            [('inline.gif', threading.current_thread().name)],
+        )
+
+    @override_settings(THUMBNAIL_WORKERS=1)
+    def test_workers_run_job_in_pool(self):
+        """С пулом картинка обрабатывается в фоновом потоке."""
+        done = threading.Event()
+        with mock.patch.object(thumbnails, '_run_logged') as run:
+            run.side_effect = lambda job, name: done.set()
+            thumbnails._submit('pooled.gif', self.job)
+            self.assertTrue(done.wait(5))
+        self.assertEqual(run.call_args.args, (self.job, 'pooled.gif'))
@@ -1,13 +1,16 @@
-from linecache import cache
-
 from django import forms
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from faker import Faker
 from mixer.backend.django import mixer
 
-from posts.models import Follow, Post
+from posts import conditional
+from posts.models import Follow, Post, TimelineEntry
 from posts.tests.common import image
 
 User = get_user_model()
@@ -144,6 +147,237 @@ class PostPagesTests(TestCase):
         )
 
 
+class FeedCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = mixer.blend(User)
+        mixer.cycle(settings.OBJECTS_PER_PAGE + 1).blend(
+            'posts.Post',
+            author=cls.author,
+        )
+        cls.urls = (
+            reverse('posts:h_page'),
+            reverse('posts:profile', kwargs={'username': cls.author}),
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_pages_are_cached_separately(self):
+        """Разные страницы ленты не отдают один и тот же фрагмент."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                first_page = self.client.get(url).content.decode()
+                second_page = self.client.get(url + '?page=2').content.decode()
+                last_post = Post.objects.order_by('pub_date', 'pk').first()
+                self.assertNotIn(last_post.get_absolute_url(), first_page)
+                self.assertIn(last_post.get_absolute_url(), second_page)
+
+    def test_equivalent_positions_share_fragment(self):
+        """Синонимы одной страницы не заводят новых записей в кэше."""
+        url = reverse('posts:h_page')
+        variants = (
+            ('', '?page=1', '?page=foo'),
+            ('?page=2', '?page=999999'),
+            ('?cursor=', '?cursor=broken', '?cursor=' + 'x' * 40),
+        )
+        for same in variants:
+            with self.subTest(variants=same):
+                keys = {
+                    self.client.get(url + query).context['feed_cache_key']
+                    for query in same
+                }
+                self.assertEqual(len(keys), 1)
+
+    def test_new_post_invalidates_cached_feed(self):
+        """Новый пост сразу появляется в закэшированной ленте."""
+        for url in self.urls:
+            self.client.get(url)
+        new_post = mixer.blend('posts.Post', author=self.author)
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.client.get(url),
+                    new_post.get_absolute_url(),
+                )
+
+
+class ConditionalGetTest(TransactionTestCase):
+    """Записи сдвигают валидаторы только после фиксации транзакции."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.author = mixer.blend(User)
+        self.group = mixer.blend('posts.Group')
+        self.other_group = mixer.blend('posts.Group')
+        self.post = Post.objects.create(
+            author=self.author,
+            group=self.group,
+            text='текст',
+        )
+        self.urls = {
+            'index': reverse('posts:h_page'),
+            'group': reverse('posts:page_post', args=(self.group.slug,)),
+            'profile': reverse('posts:profile', args=(self.author,)),
+            'post': reverse('posts:post_detail', args=(self.post.pk,)),
+        }
+
+    def etags(self) -> dict:
+        return {
+            name: self.client.get(url)['ETag']
+            for name, url in self.urls.items()
+        }
+
+    @staticmethod
+    def evict_validators() -> None:
+        """Кэш без сохранённых валидаторов, но с тем же поколением."""
+        generation = cache.get(conditional.GENERATION_KEY)
+        cache.clear()
+        cache.set(conditional.GENERATION_KEY, generation, None)
+
+    def test_unchanged_page_is_not_rendered(self):
+        """Неизменившаяся страница отдаётся ответом 304 без рендеринга."""
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                etag = self.client.get(url)['ETag']
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertFalse(response.templates)
+
+    def test_writes_change_validators(self):
+        """Новый пост, комментарий и перенос в группу меняют ETag."""
+        before = self.etags()
+        Post.objects.create(author=self.author, text='новый')
+        after_post = self.etags()
+        for name in ('index', 'profile', 'post'):
+            with self.subTest(page=name):
+                self.assertNotEqual(before[name], after_post[name])
+        self.assertEqual(before['group'], after_post['group'])
+        mixer.blend('posts.Comment', post=self.post)
+        after_comment = self.etags()
+        self.assertNotEqual(after_post['post'], after_comment['post'])
+        self.assertEqual(after_post['index'], after_comment['index'])
+        self.post.group = self.other_group
+        self.post.save()
+        self.assertNotEqual(after_comment['group'], self.etags()['group'])
+
+    def test_renames_change_validators(self):
+        """Смена имени автора или названия группы меняет ETag страниц."""
+        before = self.etags()
+        self.author.first_name = 'Новое имя'
+        self.author.save()
+        after_author = self.etags()
+        for name in ('index', 'group', 'post'):
+            with self.subTest(page=name):
+                self.assertNotEqual(before[name], after_author[name])
+        self.assertEqual(
+            self.client.get(
+                self.urls['index'],
+                HTTP_IF_NONE_MATCH=before['index'],
+            ).status_code,
+            200,
+        )
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertNotEqual(after_author['post'], self.etags()['post'])
+
+    def test_edit_changes_validators_after_eviction(self):
+        """Правка поста меняет ETag, даже если сдвиг вытеснен из кэша."""
+        self.evict_validators()
+        before = self.etags()
+        self.post.text = 'исправленный текст'
+        self.post.group = self.other_group
+        self.post.save()
+        self.evict_validators()
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                self.assertEqual(
+                    self.client.get(
+                        url,
+                        HTTP_IF_NONE_MATCH=before[name],
+                    ).status_code,
+                    200,
+                )
+
+    def test_username_change_keeps_post_validator(self):
+        """Страница поста следит за автором по id, а не по имени."""
+        self.client.get(self.urls['post'])
+        self.author.username = 'renamed'
+        self.author.save()
+        before = self.client.get(self.urls['post'])['ETag']
+        Post.objects.create(author=self.author, text='ещё пост')
+        self.assertNotEqual(
+            before,
+            self.client.get(self.urls['post'])['ETag'],
+        )
+
+    def test_etag_depends_on_user(self):
+        """Разметка зависит от пользователя, поэтому и ETag тоже."""
+        anonymous = self.etags()
+        self.client.force_login(self.author)
+        for name, etag in self.etags().items():
+            with self.subTest(page=name):
+                self.assertNotEqual(anonymous[name], etag)
+
+
+class PostCommentsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.post_few, cls.post_many = mixer.cycle(2).blend('posts.Post')
+        mixer.cycle(2).blend('posts.Comment', post=cls.post_few)
+        mixer.cycle(settings.COMMENTS_PER_PAGE + 5).blend(
+            'posts.Comment',
+            post=cls.post_many,
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def count_queries(self, url: str) -> int:
+        # У постов может оказаться общая картинка: кэш sorl не должен
+        # сокращать второй замер.
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_comments(self):
+        """Число запросов post_detail не растёт с числом комментариев."""
+        self.assertEqual(
+            self.count_queries(self.post_few.get_absolute_url()),
+            self.count_queries(self.post_many.get_absolute_url()),
+        )
+
+    def test_comments_are_paginated_by_cursor(self):
+        """Комментарии выводятся порциями, следующие отдаёт фрагмент."""
+        comments = self.client.get(
+            self.post_many.get_absolute_url(),
+        ).context['comments']
+        self.assertEqual(len(comments), settings.COMMENTS_PER_PAGE)
+        response = self.client.get(
+            reverse('posts:comments', kwargs={'pk': self.post_many.pk}),
+            {'cursor': comments.next_cursor},
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertEqual(len(response.context['comments']), 5)
+        self.assertFalse(
+            {comment.pk for comment in comments}
+            & {comment.pk for comment in response.context['comments']}
+        )
+
+    def test_more_comments_link_opens_post_page(self):
+        """Ссылка «ещё» ведёт на страницу поста, фрагмент — только для JS."""
+        url = self.post_many.get_absolute_url()
+        response = self.client.get(url)
+        fragment = reverse('posts:comments', kwargs={'pk': self.post_many.pk})
+        cursor = f'?cursor={response.context["comments"].next_cursor}'
+        self.assertContains(response, f'href="{url}{cursor}#comments"')
+        self.assertContains(response, f'data-fragment="{fragment}{cursor}"')
+        response = self.client.get(url + cursor)
+        self.assertTemplateUsed(response, 'posts/post_detail.html')
+        self.assertEqual(len(response.context['comments']), 5)
+
+
 class GroupPostPagesTests(TestCase):
     @classmethod
     def setUpTestData(cls) -> None:
@@ -238,6 +472,30 @@ class FollowingViewsTest(TestCase):
             self.post.author,
         )
 
+    def test_new_post_is_pushed_to_subscriber_timeline(self):
+        """Новый пост автора раскладывается в ленты подписчиков."""
+        Follow.objects.create(
+            user=self.authorized_follower,
+            author=self.author_following,
+        )
+        new_post = mixer.blend('posts.Post', author=self.author_following)
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.authorized_follower,
+                post=new_post,
+            ).exists()
+        )
+
+    def test_unsubscription_prunes_timeline(self):
+        """Отписка убирает посты автора из ленты."""
+        for name in ('posts:profile_follow', 'posts:profile_unfollow'):
+            self.authorized_client.get(
+                reverse(name, kwargs={'username': self.author_following}),
+            )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.authorized_follower)
+        )
+
     def test_new_post_not_appears_in_feed_non_subscribers(self):
         """Запись пользователя не появляется в ленте неподписчиков."""
         self.assertTrue(
@@ -0,0 +1,198 @@
+"""Предварительное создание миниатюр картинок постов.
+
+Миниатюры всех размеров, которые используют шаблоны, создаются в
+фоновом пуле потоков после сохранения поста. При рендере шаблона
+PregeneratedBackend только ищет готовую миниатюру в хранилище sorl и,
+если её ещё нет, ставит создание в очередь и отдаёт заглушку. Для лент
+prefetch() находит миниатюры всей страницы одним запросом.
+"""
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import (
+    DummyImageFile,
+    ImageFile,
+    deserialize_image_file,
+)
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    KVStore as CachedDBKVStore,
+)
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from posts import conditional, feed_cache
+from posts.models import Post
+
+logger = logging.getLogger(__name__)
+
+# Размер и параметры миниатюры в карточке поста.
+FEED_GEOMETRY = ('960x339', {'crop': 'center', 'upscale': True})
+
+# Размеры и параметры миниатюр из шаблонов.
+GEOMETRIES = (FEED_GEOMETRY,)
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+_pending: set[tuple[Callable, str]] = set()
+
+_lock = threading.Lock()
+
+
+class PregeneratedBackend(ThumbnailBackend):
+    """Бэкенд sorl, который никогда не создаёт миниатюру при рендере."""
+
+    def thumbnail_file(self, file_, geometry_string, **options) -> ImageFile:
+        """Файл миниатюры, который создал бы sorl для этих параметров."""
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return ImageFile(
+            self._get_thumbnail_filename(source, geometry_string, options),
+            default.storage,
+        )
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        cached = default.kvstore.get(
+            self.thumbnail_file(file_, geometry_string, **options),
+        )
+        if cached:
+            return cached
+        schedule(ImageFile(file_).name)
+        return DummyImageFile(geometry_string)
+
+
+def _get_many(keys: list[str]) -> dict:
+    if not isinstance(default.kvstore, CachedDBKVStore):
+        return {
+            key: value
+            for key in keys
+            if (value := default.kvstore._get_raw(key)) is not None
+        }
+    kv_cache = default.kvstore.cache
+    values = kv_cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        found = dict(
+            KVStoreModel.objects.filter(key__in=missing).values_list(
+                'key',
+                'value',
+            ),
+        )
+        kv_cache.set_many(found, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(found)
+    return {
+        key: value for key, value in values.items() if value != EMPTY_VALUE
+    }
+
+
+def prefetch(posts: Iterable[Post], geometry=FEED_GEOMETRY) -> None:
+    """Находит миниатюры всех постов одним обращением к хранилищу sorl.
+
+    Каждому посту присваивается атрибут thumbnail: готовая миниатюра или
+    None, если её ещё нет (тогда создание ставится в очередь).
+    """
+    geometry_string, options = geometry
+    backend = PregeneratedBackend()
+    posts_by_key = defaultdict(list)
+    for post in posts:
+        post.thumbnail = None
+        if post.image:
+            thumbnail = backend.thumbnail_file(
+                post.image,
+                geometry_string,
+                **options,
+            )
+            # Одинаковые картинки хранятся одним файлом у нескольких постов.
+            posts_by_key[add_prefix(thumbnail.key)].append(post)
+    if not posts_by_key:
+        return
+    values = _get_many(list(posts_by_key))
+    for key, key_posts in posts_by_key.items():
+        if key not in values:
+            schedule(key_posts[0].image.name)
+            continue
+        thumbnail = deserialize_image_file(values[key])
+        for post in key_posts:
+            post.thumbnail = thumbnail
+
+
+def generate(name: str) -> None:
+    """Создаёт все миниатюры картинки из GEOMETRIES."""
+    backend = ThumbnailBackend()
+    source = ImageFile(name, Post._meta.get_field('image').storage)
+    for geometry, options in GEOMETRIES:
+        backend.get_thumbnail(source, geometry, **options)
+    # Страницы и карточки с заглушкой вместо миниатюры пора обновить.
+    posts = Post.objects.filter(image=name)
+    posts.update(updated_at=timezone.now())
+    feed_cache.bump()
+    for pk, author_id, username, group_slug in posts.values_list(
+        'pk',
+        'author_id',
+        'author__username',
+        'group__slug',
+    ):
+        conditional.bump_post(pk, author_id, username, group_slug)
+
+
+Job = Callable[[str], None]
+
+
+def _run_logged(job: Job, name: str) -> None:
+    try:
+        job(name)
+    except Exception:
+        logger.exception('Не удалось обработать картинку %s', name)
+
+
+def _run(job: Job, name: str) -> None:
+    close_old_connections()
+    try:
+        _run_logged(job, name)
+    finally:
+        with _lock:
+            _pending.discard((job, name))
+        close_old_connections()
+
+
+def _submit(name: str, job: Job) -> None:
+    global _executor
+    if not settings.THUMBNAIL_WORKERS:
+        # Пул отключён: картинка обрабатывается сразу, в этом потоке.
+        _run_logged(job, name)
+        return
+    with _lock:
+        if (job, name) in _pending:
+            return
+        _pending.add((job, name))
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    _executor.submit(_run, job, name)
+
+
+def schedule(name: str, job: Job = generate) -> None:
+    """Ставит обработку картинки в очередь после фиксации транзакции.
+
+    По умолчанию обработка — создание миниатюр.
+    """
+    transaction.on_commit(lambda: _submit(name, job))
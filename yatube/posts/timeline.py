@@ -0,0 +1,77 @@
+"""Материализованная лента подписок.
+
+Каждый новый пост раскладывается в ленты подписчиков автора при
+сохранении, поэтому страница подписок читает одну таблицу по индексу
+(user, -pub_date) вместо соединения постов с подписками.
+"""
+from itertools import islice
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from posts import feed_counts
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+def _batches(entries: Iterable[TimelineEntry]) -> Iterator[list]:
+    entries = iter(entries)
+    while batch := list(islice(entries, settings.TIMELINE_BATCH_SIZE)):
+        yield batch
+
+
+def _insert(entries: Iterable[TimelineEntry]) -> None:
+    for batch in _batches(entries):
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def push_post(post: Post) -> None:
+    """Добавляет пост в ленты всех подписчиков автора."""
+    followers = list(
+        Follow.objects.filter(author_id=post.author_id).values_list(
+            'user_id',
+            flat=True,
+        ),
+    )
+    _insert(
+        TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in followers
+    )
+    feed_counts.forget('follow', followers)
+
+
+def backfill(user: User, author: User) -> None:
+    """Добавляет в ленту читателя все посты нового автора."""
+    _insert(
+        TimelineEntry(user=user, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in author.posts.values_list(
+            'pk',
+            'pub_date',
+        ).iterator()
+    )
+    feed_counts.forget('follow', [user.pk])
+
+
+def prune(user: User, author: User) -> None:
+    """Удаляет из ленты читателя посты автора, от которого он отписался."""
+    TimelineEntry.objects.filter(user=user, post__author=author).delete()
+    feed_counts.forget('follow', [user.pk])
+
+
+def rebuild() -> None:
+    """Заново строит ленты всех пользователей по таблице подписок."""
+    TimelineEntry.objects.all().delete()
+    _insert(
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for user_id, post_id, pub_date in Follow.objects.filter(
+            author__posts__isnull=False,
+        )
+        .values_list(
+            'user_id',
+            'author__posts__pk',
+            'author__posts__pub_date',
+        )
+        .iterator()
+    )
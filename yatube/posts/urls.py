@@ -1,6 +1,6 @@
 from django.urls import path
 
-from posts import views
+from posts import api, views
 
 app_name = '%(posts_label)s'
 
@@ -8,6 +8,7 @@ urlpatterns = [
     path('', views.index, name='h_page'),
     path('create/', views.post_create, name='post_create'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.post_search, name='search'),
     path('group/<slug:slug>/', views.group_posts, name='page_post'),
     path('posts/<int:pk>/', views.post_detail, name='post_detail'),
     path('posts/<int:pk>/edit/', views.post_edit, name='post_edit'),
@@ -22,5 +23,24 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow',
     ),
+    path(
+        'profile/<str:username>/followers/',
+        views.followers,
+        name='followers',
+    ),
+    path(
+        'profile/<str:username>/following/',
+        views.following,
+        name='following',
+    ),
     path('posts/<int:pk>/comment/', views.add_comment, name='add_comment'),
+    path('posts/<int:pk>/comments/', views.post_comments, name='comments'),
+    path('api/posts/', api.index, name='api_index'),
+    path('api/posts/batch/', api.posts_by_ids, name='api_posts_by_ids'),
+    path('api/posts/<int:pk>/', api.post_detail, name='api_post_detail'),
+    path('api/group/<slug:slug>/', api.group_posts, name='api_group_posts'),
+    path('api/profile/<str:username>/', api.profile, name='api_profile'),
+    path('api/follow/', api.follow_index, name='api_follow_index'),
+    path('api/following/', api.following_ids, name='api_following_ids'),
+    path('export/<str:kind>/', views.export, name='export'),
 ]
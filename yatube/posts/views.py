@@ -1,77 +1,144 @@
+from typing import Callable
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.http import HttpRequest, HttpResponse, HttpResponseRedirect
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core.routers import primary_db
+from posts import (
+    conditional,
+    counters,
+    exporter,
+    feed_cache,
+    feed_counts,
+    follow_graph,
+    images,
+    search,
+)
 from posts.forms import CommentForm, PostForm
-from posts.models import Follow, Group, Post
-from yatube.utils import paginate
+from posts.models import Comment, Group, Post
+from yatube.utils import KeysetPage, paginate, paginate_by_cursor
 
 User = get_user_model()
 
 
+@conditional.conditional(lambda: [('index', '')])
 def index(request: HttpRequest) -> HttpResponse:
+    page_obj = paginate(
+        request,
+        Post.objects.select_related('author', 'group').all(),
+        count=feed_counts.provider('index'),
+    )
     return render(
         request,
         'posts/index.html',
         {
-            'page_obj': paginate(
-                request,
-                Post.objects.select_related('author', 'group').all(),
-            ),
+            'page_obj': page_obj,
+            **feed_cache.context(request, page_obj),
         },
     )
 
 
+@conditional.conditional(lambda slug: [('group', slug)])
 def group_posts(request: HttpRequest, slug: str) -> HttpResponse:
     group = get_object_or_404(Group, slug=slug)
+    page_obj = paginate(
+        request,
+        group.posts.select_related('author').all(),
+        count=feed_counts.provider('group', group.pk),
+    )
     return render(
         request,
         'posts/group_list.html',
         {
             'group': group,
-            'page_obj': paginate(
-                request,
-                group.posts.select_related('author').all(),
-            ),
+            'page_obj': page_obj,
+            **feed_cache.context(request, page_obj, group.pk),
         },
     )
 
 
+@conditional.conditional(lambda username: [('profile', username)])
 def profile(request: HttpRequest, username: str) -> HttpResponse:
-    user_author = get_object_or_404(User, username=username)
-    following = (
-        request.user.is_authenticated
-        and Follow.objects.filter(
-            author=user_author,
-            user=request.user,
-        ).exists()
+    user_author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username,
+    )
+    following = user_author.pk in follow_graph.followed_ids(
+        request.user,
+        [user_author.pk],
+    )
+    page_obj = paginate(
+        request,
+        user_author.posts.select_related('group').all(),
+        count=feed_counts.provider('author', user_author.pk),
     )
     return render(
         request,
         'posts/profile.html',
         {
-            'page_obj': paginate(
-                request,
-                user_author.posts.select_related('group').all(),
-            ),
+            'page_obj': page_obj,
             'user_name': user_author,
+            'stats': counters.user_stats(user_author),
             'following': following,
+            **feed_cache.context(request, page_obj, user_author.pk),
         },
     )
 
 
+def _comments_page(request: HttpRequest, post_pk: int) -> KeysetPage:
+    return paginate_by_cursor(
+        request,
+        Comment.objects.select_related('author').filter(post_id=post_pk),
+        settings.COMMENTS_PER_PAGE,
+        keys=('created', 'pk'),
+    )
+
+
+@conditional.conditional(
+    lambda pk: [('post', pk), ('author', conditional.post_author(pk))],
+)
 def post_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        pk=pk,
+    )
     return render(
         request,
         'posts/post_detail.html',
         {
-            'post': get_object_or_404(Post, pk=pk),
+            'post': post,
+            'author_stats': counters.user_stats(post.author),
+            'comments': _comments_page(request, post.pk),
             'form': CommentForm(request.POST or None),
         },
     )
 
 
+def post_comments(request: HttpRequest, pk: int) -> HttpResponse:
+    post = get_object_or_404(Post.objects.only('pk'), pk=pk)
+    return render(
+        request,
+        'posts/includes/comments.html',
+        {
+            'post': post,
+            'comments': _comments_page(request, post.pk),
+        },
+    )
+
+
 @login_required
 def post_create(request: HttpRequest) -> HttpResponse:
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -84,7 +151,9 @@ def post_create(request: HttpRequest) -> HttpResponse:
             },
         )
     form.instance.author = request.user
-    form.save()
+    with transaction.atomic():
+        post = form.save()
+        images.enqueue(post)
     return redirect('posts:profile', request.user)
 
 
@@ -96,10 +165,16 @@ def post_edit(request: HttpRequest, pk: int) -> HttpResponse:
         files=request.FILES or None,
         instance=post,
     )
-    if request.user != post.author:
+    if request.user.pk != post.author_id:
         return redirect('posts:post_detail', pk)
     if form.is_valid():
-        form.save()
+        # Счётчики меняются отдельными UPDATE и не должны затираться.
+        fields = (*PostForm.Meta.fields, 'updated_at')
+        if 'image' in form.changed_data:
+            fields = (*fields, *images.METADATA_FIELDS)
+        form.save(commit=False).save(update_fields=fields)
+        if 'image' in form.changed_data:
+            images.enqueue(post)
         return redirect('posts:post_detail', pk)
     return render(
         request,
@@ -119,7 +194,9 @@ def add_comment(request: HttpRequest, pk: int) -> HttpResponseRedirect:
     if form.is_valid():
         form.instance.author = request.user
         form.instance.post = post
-        form.save()
+        with transaction.atomic():
+            form.save()
+            counters.change_comment_count(post.pk, 1)
     return redirect('posts:post_detail', pk)
 
 
@@ -129,9 +206,18 @@ def follow_index(request: HttpRequest) -> HttpResponse:
         request,
         Post.objects.select_related(
             'author',
-        ).filter(
-            author__following__user=request.user,
-        ),
+            'group',
+        )
+        .filter(
+            timeline__user=request.user,
+        )
+        .annotate(
+            feed_date=F('timeline__pub_date'),
+            feed_post=F('timeline__post'),
+        )
+        .order_by('-feed_date', '-feed_post'),
+        keys=('feed_date', 'feed_post'),
+        count=feed_counts.provider('follow', request.user.pk),
     )
     return render(
         request,
@@ -142,25 +228,134 @@ def follow_index(request: HttpRequest) -> HttpResponse:
     )
 
 
-@login_required
-def profile_follow(
-    request: HttpRequest, username: str
-) -> HttpResponseRedirect:
-    author_for_follow = get_object_or_404(User, username=username)
-    if author_for_follow != request.user:
-        Follow.objects.get_or_create(
-            user=request.user, author=author_for_follow
-        )
+def post_search(request: HttpRequest) -> HttpResponse:
+    query = request.GET.get('q', '').strip()
+    posts = Post.objects.select_related('author', 'group')
+    if group := request.GET.get('group'):
+        posts = posts.filter(group__slug=group)
+    if author := request.GET.get('author'):
+        posts = posts.filter(author__username=author)
+    return render(
+        request,
+        'posts/search.html',
+        {
+            'query': query,
+            'page_obj': paginate_by_cursor(
+                request,
+                search.search(posts, query),
+                keys=('score', 'pk'),
+            ),
+        },
+    )
+
+
+def _follow_response(
+    request: HttpRequest,
+    following: bool,
+    changed: bool,
+) -> HttpResponse:
+    # Кнопки со страниц отправляют POST и получают короткий ответ вместо
+    # перехода на ленту подписок.
+    if request.method == 'POST':
+        return JsonResponse({'following': following, 'changed': changed})
     return redirect('posts:follow_index')
 
 
+@primary_db
 @login_required
-def profile_unfollow(
-    request: HttpRequest, username: str
-) -> HttpResponseRedirect:
-    get_object_or_404(
-        Follow,
-        user=request.user,
-        author__username=username,
-    ).delete()
-    return redirect('posts:follow_index')
+def profile_follow(request: HttpRequest, username: str) -> HttpResponse:
+    author = get_object_or_404(User, username=username)
+    return _follow_response(
+        request,
+        True,
+        follow_graph.follow(request.user, author),
+    )
+
+
+@primary_db
+@login_required
+def profile_unfollow(request: HttpRequest, username: str) -> HttpResponse:
+    author = get_object_or_404(User, username=username)
+    return _follow_response(
+        request,
+        False,
+        follow_graph.unfollow(request.user, author),
+    )
+
+
+def _follow_list(
+    request: HttpRequest,
+    username: str,
+    users: Callable[[User], QuerySet],
+    count: str,
+    title: str,
+) -> HttpResponse:
+    user_author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username,
+    )
+    stats = counters.user_stats(user_author)
+    page = paginate(
+        request,
+        users(user_author),
+        keys=follow_graph.KEYS,
+        count=lambda: getattr(stats, count),
+    )
+    return render(
+        request,
+        'posts/follow_list.html',
+        {
+            'page_obj': page,
+            'user_name': user_author,
+            'title': title,
+            'followed': follow_graph.followed_ids(
+                request.user,
+                (user.pk for user in page),
+            ),
+        },
+    )
+
+
+def followers(request: HttpRequest, username: str) -> HttpResponse:
+    return _follow_list(
+        request,
+        username,
+        follow_graph.followers,
+        'followers_count',
+        'Подписчики',
+    )
+
+
+def following(request: HttpRequest, username: str) -> HttpResponse:
+    return _follow_list(
+        request,
+        username,
+        follow_graph.following,
+        'following_count',
+        'Подписки',
+    )
+
+
+@staff_member_required
+def export(request: HttpRequest, kind: str) -> HttpResponse:
+    output_format = request.GET.get('format', 'jsonl')
+    if kind not in exporter.KINDS or output_format not in exporter.FORMATS:
+        return HttpResponseBadRequest('Неизвестный тип или формат выгрузки.')
+    try:
+        objects = exporter.queryset(
+            kind,
+            since=exporter.parse_moment(request.GET.get('since')),
+            until=exporter.parse_moment(request.GET.get('until')),
+            author=request.GET.get('author'),
+            group=request.GET.get('group'),
+        )
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    response = StreamingHttpResponse(
+        exporter.lines(kind, objects, output_format),
+        content_type=exporter.CONTENT_TYPES[output_format],
+    )
+    response[
+        'Content-Disposition'
+    ] = f'attachment; filename="{kind}.{output_format}"'
+    return response
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
@@ -32,6 +33,8 @@ INSTALLED_APPS = [
 
 # fmt: on
 MIDDLEWARE = [
+    'core.middleware.server_timing.ServerTimingMiddleware',
+    'core.routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,9 +75,37 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': str(BASE_DIR / 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
     },
 }
 
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер кэша в КиБ, а не в страницах.
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+}
+
+# Локальные реплики — копии db.sqlite3, которые обновляет команда
+# sync_sqlite_replicas.
+SQLITE_REPLICAS = int(os.environ.get('YATUBE_SQLITE_REPLICAS', 0))
+
+for number in range(1, SQLITE_REPLICAS + 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': str(BASE_DIR / f'db.replica{number}.sqlite3'),
+        'CONN_MAX_AGE': 600,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+REPLICA_STICKY_SECONDS = 5
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -98,10 +129,37 @@ STATIC_URL = '/static/'
 
 OBJECTS_PER_PAGE = 10
 
+COMMENTS_PER_PAGE = 20
+
 SHOW_WORDS = 15
 
 SHOW_CHARACTERS = 15
 
+TIMELINE_BATCH_SIZE = 1000
+
+THUMBNAIL_BACKEND = 'posts.thumbnails.PregeneratedBackend'
+
+# 0 — без пула: картинки обрабатываются сразу, в потоке запроса.
+THUMBNAIL_WORKERS = 2
+
+IMAGE_MAX_SIZE = 2048
+
+IMAGE_FORMAT = 'WEBP'
+
+IMAGE_QUALITY = 80
+
+# Сколько секунд хранить картинку без ссылок, прежде чем sweep_images
+# её удалит: за это время загрузка успевает сохранить пост.
+IMAGE_SWEEP_GRACE = 60 * 60
+
+SEARCH_BATCH_SIZE = 1000
+
+IMPORT_BATCH_SIZE = 5000
+
+EXPORT_CHUNK_SIZE = 2000
+
+SERVER_TIMING_SAMPLE_RATE = 0.05
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:h_page'
@@ -116,8 +174,25 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    },
-}
+# Фрагменты лент, итоги и валидаторы сбрасываются сменой версии в кэше.
+# LocMemCache у каждого процесса свой, и смену версии видит только
+# процесс, обработавший запись, поэтому долгое время жизни допустимо
+# лишь с общим кэшем (memcached, нужен пакет python-memcached). Без
+# него записи живут минуту: на столько может отстать соседний процесс.
+MEMCACHED_LOCATION = os.environ.get('YATUBE_MEMCACHED')
+
+if MEMCACHED_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': MEMCACHED_LOCATION,
+        },
+    }
+    FEED_CACHE_TIMEOUT = 60 * 60 * 6
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+    FEED_CACHE_TIMEOUT = 60
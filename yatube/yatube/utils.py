@@ -1,13 +1,267 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional
+
 from django.conf import settings
-from django.core.paginator import Page, Paginator
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db.models import Q, QuerySet
 from django.http import HttpRequest
+from django.utils.functional import cached_property
+
+CURSOR_PARAM = 'cursor'
+
+NEXT = 'n'
+
+PREVIOUS = 'p'
+
+DEFAULT_KEYS = ('pub_date', 'pk')
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+def encode_cursor(direction: str, value: Any, pk: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([direction, value, pk])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[str, Any, int]:
+    """Направление, значение ключа и pk из курсора.
+
+    Значение возвращается как есть (строка или число): к типу поля
+    упорядочивания его приводит KeysetPaginator.
+    """
+    try:
+        direction, value, pk = json.loads(
+            base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)),
+        )
+    except (binascii.Error, TypeError, ValueError) as error:
+        raise InvalidCursor('Некорректный курсор.') from error
+    if (
+        direction not in (NEXT, PREVIOUS)
+        or isinstance(value, bool)
+        or not isinstance(value, (str, int, float))
+    ):
+        raise InvalidCursor('Некорректный курсор.')
+    if isinstance(pk, bool):
+        raise InvalidCursor('Некорректный курсор.')
+    try:
+        return direction, value, int(pk)
+    except (TypeError, ValueError) as error:
+        raise InvalidCursor('Некорректный курсор.') from error
+
+
+class KeysetPage(Page):
+    """Страница, построенная по ключу (например, (pub_date, id)).
+
+    Не знает ни своего номера, ни общего числа страниц: вместо них
+    отдаёт непрозрачные курсоры соседних страниц.
+    """
+
+    def __init__(
+        self,
+        object_list: list,
+        paginator: 'KeysetPaginator',
+        next_cursor: Optional[str],
+        previous_cursor: Optional[str],
+    ) -> None:
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        # Курсор, по которому страница на самом деле построена: None для
+        # первой страницы, в том числе вместо некорректного курсора.
+        self.cursor = None
+
+    def __repr__(self) -> str:
+        return '<Keyset page>'
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def next_page_number(self) -> None:
+        raise InvalidPage('Используйте next_cursor.')
+
+    def previous_page_number(self) -> None:
+        raise InvalidPage('Используйте previous_cursor.')
+
+    def start_index(self) -> None:
+        raise InvalidPage('Номера записей не вычисляются.')
+
+    def end_index(self) -> None:
+        raise InvalidPage('Номера записей не вычисляются.')
+
+
+class KeysetPaginator(Paginator):
+    """Постраничный вывод без SELECT COUNT(*) и OFFSET.
+
+    Записи упорядочиваются по убыванию пары keys (по умолчанию
+    (pub_date, id)), а граница страницы задаётся курсором, поэтому
+    глубина страницы не влияет на стоимость запроса.
+    """
+
+    keyset = True
+
+    def __init__(
+        self,
+        object_list: QuerySet,
+        per_page: int,
+        keys: tuple[str, str] = DEFAULT_KEYS,
+    ) -> None:
+        self.order_key, self.pk_key = keys
+        super().__init__(
+            object_list.order_by(f'-{self.order_key}', f'-{self.pk_key}'),
+            per_page,
+        )
+
+    @property
+    def count(self) -> int:
+        raise InvalidPage('Постраничный вывод по курсору не считает записи.')
+
+    @property
+    def num_pages(self) -> int:
+        raise InvalidPage('Постраничный вывод по курсору не считает страницы.')
+
+    def page(self, cursor: Optional[str]) -> KeysetPage:
+        if not cursor:
+            return self._page_after(self.object_list, first=True)
+        direction, value, pk = decode_cursor(cursor)
+        value = self._order_value(value)
+        lookup = 'lt' if direction == NEXT else 'gt'
+        queryset = self.object_list.filter(
+            Q(**{f'{self.order_key}__{lookup}': value})
+            | Q(
+                **{
+                    self.order_key: value,
+                    f'{self.pk_key}__{lookup}': pk,
+                },
+            ),
+        )
+        if direction == NEXT:
+            page = self._page_after(queryset)
+        else:
+            page = self._page_before(queryset.reverse())
+        page.cursor = encode_cursor(direction, value, pk)
+        return page
+
+    def get_page(self, cursor: Optional[str]) -> KeysetPage:
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def _order_value(self, value: Any) -> Any:
+        # Курсор мог прийти от другой ленты (например, оценка поиска на
+        # ленте по дате) или быть подделан: значение приводится к типу
+        # поля упорядочивания, а не подставляется в фильтр как есть.
+        field = (
+            self.object_list.query.chain()
+            .resolve_ref(self.order_key)
+            .output_field
+        )
+        try:
+            return field.to_python(value)
+        except (TypeError, ValidationError) as error:
+            raise InvalidCursor('Некорректный курсор.') from error
+
+    def _page_after(
+        self,
+        queryset: QuerySet,
+        first: bool = False,
+    ) -> KeysetPage:
+        objects = list(queryset[: self.per_page + 1])  # fmt: skip
+        has_more = len(objects) > self.per_page
+        objects = objects[: self.per_page]  # fmt: skip
+        return KeysetPage(
+            objects,
+            self,
+            self._cursor(NEXT, objects[-1]) if has_more else None,
+            None
+            if first or not objects
+            else self._cursor(
+                PREVIOUS,
+                objects[0],
+            ),
+        )
+
+    def _page_before(self, queryset: QuerySet) -> KeysetPage:
+        objects = list(queryset[: self.per_page + 1])  # fmt: skip
+        has_more = len(objects) > self.per_page
+        objects = objects[: self.per_page][::-1]  # fmt: skip
+        return KeysetPage(
+            objects,
+            self,
+            self._cursor(NEXT, objects[-1]) if objects else None,
+            self._cursor(PREVIOUS, objects[0]) if has_more else None,
+        )
+
+    def _cursor(self, direction: str, obj: Any) -> str:
+        # Строки values() приходят словарями, а не объектами моделей.
+        if isinstance(obj, dict):
+            return encode_cursor(
+                direction, obj[self.order_key], obj[self.pk_key]
+            )
+        return encode_cursor(
+            direction,
+            getattr(obj, self.order_key),
+            getattr(obj, self.pk_key),
+        )
+
+
+def paginate_by_cursor(
+    request: HttpRequest,
+    objects: QuerySet,
+    per_page: int = settings.OBJECTS_PER_PAGE,
+    keys: tuple[str, str] = DEFAULT_KEYS,
+) -> KeysetPage:
+    return KeysetPaginator(objects, per_page, keys).get_page(
+        request.GET.get(CURSOR_PARAM),
+    )
+
+
+class CountedPaginator(Paginator):
+    """Постраничный вывод, берущий число записей у count вместо COUNT(*)."""
+
+    def __init__(
+        self,
+        object_list: QuerySet,
+        per_page: int,
+        count: Callable[[], int],
+    ) -> None:
+        super().__init__(object_list, per_page)
+        self.count_provider = count
+
+    @cached_property
+    def count(self) -> int:
+        return self.count_provider()
 
 
 def paginate(
     request: HttpRequest,
     posts,
     post_per_one_page: int = settings.OBJECTS_PER_PAGE,
+    keys: tuple[str, str] = DEFAULT_KEYS,
+    count: Optional[Callable[[], int]] = None,
 ) -> Page:
-    return Paginator(posts, post_per_one_page).get_page(
-        request.GET.get('page'),
-    )
+    """Возвращает страницу постов.
+
+    Если в запросе передан параметр cursor, используется постраничный
+    вывод по ключу, иначе обычный вывод по номеру страницы. count
+    возвращает готовое число записей (например, из кэша), тогда
+    SELECT COUNT(*) не выполняется.
+    """
+    if CURSOR_PARAM in request.GET:
+        return paginate_by_cursor(request, posts, post_per_one_page, keys)
+    if count is None:
+        paginator = Paginator(posts, post_per_one_page)
+    else:
+        paginator = CountedPaginator(posts, post_per_one_page, count)
+    return paginator.get_page(request.GET.get('page'))